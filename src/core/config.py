@@ -4,9 +4,13 @@ Application configuration settings
 
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
-from typing import List, Union
+from functools import cached_property, lru_cache
+from typing import List, Tuple, Union
 import os
 import json
+import ssl
+
+__all__ = ["Settings", "get_settings", "settings", "TLS_CONFIG", "get_tls_context"]
 
 class Settings(BaseSettings):
     """Application settings"""
@@ -38,6 +42,8 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     REDIS_PASSWORD: str = ""
+    # Mirror sync task status into Redis so any worker can answer status polls
+    SYNC_STATUS_REDIS: bool = False
     
     # Database (for sync history and user data)
     DATABASE_URL: str = "sqlite:///./playlist_sync.db"
@@ -52,41 +58,41 @@ class Settings(BaseSettings):
         """Parse ALLOWED_ORIGINS from various input formats and return as string"""
         if isinstance(v, list):
             return ','.join(v)
-        if isinstance(v, str):
-            # Handle empty string
-            if not v.strip():
-                return "http://localhost:3000"
-            # Already a string, return as-is
+        if isinstance(v, str) and v.strip():
             return v.strip()
         return "http://localhost:3000"
     
-    @property
-    def allowed_origins_list(self) -> List[str]:
-        """Get ALLOWED_ORIGINS as a list"""
-        if not self.ALLOWED_ORIGINS:
-            return ["http://localhost:3000"]
+    @cached_property
+    def allowed_origins_list(self) -> Tuple[str, ...]:
+        """Get ALLOWED_ORIGINS as a tuple, parsed once on first access"""
+        return tuple(self._parse_origins())
+    
+    def _parse_origins(self) -> List[str]:
+        """Parse the raw ALLOWED_ORIGINS string into a list of origins"""
+        origins = self.ALLOWED_ORIGINS.strip()
         
         # Handle JSON string format
-        if self.ALLOWED_ORIGINS.strip().startswith('['):
+        if origins.startswith('['):
             try:
-                parsed = json.loads(self.ALLOWED_ORIGINS)
+                parsed = json.loads(origins)
                 return parsed if isinstance(parsed, list) else [str(parsed)]
             except json.JSONDecodeError:
                 pass
         
-        # Handle comma-separated string
-        if ',' in self.ALLOWED_ORIGINS:
-            return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(',') if origin.strip()]
-        
-        # Single URL
-        return [self.ALLOWED_ORIGINS.strip()]
+        # Comma-separated string; a single URL is just a one-element split
+        return [origin.strip() for origin in origins.split(',') if origin.strip()] or ["http://localhost:3000"]
     
     class Config:
         env_file = ".env"
         case_sensitive = True
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build the settings once per process and reuse the same instance"""
+    return Settings()
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
 
 # TLS 1.3 configuration for security compliance
 TLS_CONFIG = {
@@ -94,4 +100,15 @@ TLS_CONFIG = {
     "ciphers": "TLS_AES_256_GCM_SHA384:TLS_CHACHA20_POLY1305_SHA256:TLS_AES_128_GCM_SHA256",
     "verify_mode": "CERT_REQUIRED",
     "check_hostname": True
-}
\ No newline at end of file
+}
+
+@lru_cache(maxsize=1)
+def get_tls_context() -> ssl.SSLContext:
+    """Build the client SSLContext described by TLS_CONFIG once per process"""
+    context = ssl.create_default_context()
+    context.minimum_version = ssl.TLSVersion[TLS_CONFIG["ssl_version"]]
+    context.verify_mode = ssl.VerifyMode[TLS_CONFIG["verify_mode"]]
+    context.check_hostname = TLS_CONFIG["check_hostname"]
+    # The listed TLS 1.3 suites are OpenSSL's defaults; Python's ssl module has
+    # no API to restrict TLS 1.3 suites, so "ciphers" is informational only
+    return context
@@ -0,0 +1,49 @@
+"""
+Shared HTTP client sessions for outbound API calls
+Keeps connection pools and TLS sessions alive across requests
+"""
+
+import weakref
+
+import aiohttp
+import orjson
+
+from .config import get_tls_context
+
+# Sessions created by this module, closed together on application shutdown
+_open_sessions: "weakref.WeakSet[aiohttp.ClientSession]" = weakref.WeakSet()
+
+
+def _json_dumps(obj) -> str:
+    """Encode request bodies with orjson"""
+    return orjson.dumps(obj).decode()
+
+
+def create_client_session() -> aiohttp.ClientSession:
+    """Create a pooled keep-alive ClientSession using the shared TLS context
+    
+    Must be called from a running event loop; callers keep the session and
+    reuse it for every request instead of opening one per call.
+    """
+    connector = aiohttp.TCPConnector(
+        ssl=get_tls_context(),
+        limit=100,
+        limit_per_host=30,
+        keepalive_timeout=75,
+        # The API hosts are fixed, so resolve them at most every five minutes
+        ttl_dns_cache=300
+    )
+    session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=30),
+        json_serialize=_json_dumps
+    )
+    _open_sessions.add(session)
+    return session
+
+
+async def close_client_sessions():
+    """Close every session created by create_client_session"""
+    for session in list(_open_sessions):
+        if not session.closed:
+            await session.close()
@@ -0,0 +1,174 @@
+"""
+ASGI middleware for the FastAPI application
+Implements CORS handling directly on the ASGI interface
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Header = Tuple[bytes, bytes]
+
+_ALLOW_CREDENTIALS: Header = (b"access-control-allow-credentials", b"true")
+_VARY_ORIGIN: Header = (b"vary", b"Origin")
+_CONTENT_TYPE_TEXT: Header = (b"content-type", b"text/plain; charset=utf-8")
+_CONTENT_TYPE_JSON: Header = (b"content-type", b"application/json")
+_INTERNAL_ERROR_BODY = b'{"detail":"Internal server error"}'
+
+
+class FastCORSMiddleware:
+    """Pure ASGI CORS middleware for a fixed set of allowed origins
+
+    Answers preflight requests without invoking the application and adds the
+    CORS response headers by wrapping ``send``, so no Request/Response objects
+    are created per request.
+    """
+
+    def __init__(
+        self,
+        app,
+        allowed_origins: Iterable[str],
+        allow_methods: Iterable[str] = ("GET", "POST", "PUT", "DELETE"),
+        allow_credentials: bool = True,
+        max_age: int = 600
+    ):
+        self.app = app
+        origins = frozenset(allowed_origins)
+        self.allow_all_origins = "*" in origins
+        self.allow_methods = frozenset(method.encode("latin-1") for method in allow_methods)
+        self.allow_credentials = allow_credentials
+
+        # Every header value is encoded once here, never per request
+        self.simple_headers: List[Header] = [_VARY_ORIGIN]
+        self.preflight_headers: List[Header] = [
+            (b"access-control-allow-methods", b", ".join(sorted(self.allow_methods))),
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+            _VARY_ORIGIN,
+        ]
+        if allow_credentials:
+            self.simple_headers.append(_ALLOW_CREDENTIALS)
+            self.preflight_headers.append(_ALLOW_CREDENTIALS)
+        self.origin_headers: Dict[bytes, Header] = {
+            origin.encode("latin-1"): (b"access-control-allow-origin", origin.encode("latin-1"))
+            for origin in origins if origin != "*"
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin: Optional[bytes] = None
+        request_method: Optional[bytes] = None
+        request_headers: Optional[bytes] = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        allow_origin_header = self.origin_headers.get(origin)
+        if allow_origin_header is None and self.allow_all_origins:
+            allow_origin_header = (b"access-control-allow-origin", origin)
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._send_preflight(send, allow_origin_header, request_method, request_headers)
+            return
+
+        if allow_origin_header is None:
+            await self.app(scope, receive, send)
+            return
+
+        cors_headers = [allow_origin_header, *self.simple_headers]
+
+        async def send_with_cors_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *cors_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors_headers)
+
+    async def _send_preflight(
+        self,
+        send,
+        allow_origin_header: Optional[Header],
+        request_method: bytes,
+        request_headers: Optional[bytes]
+    ):
+        """Answer a CORS preflight request directly"""
+        if allow_origin_header is None:
+            await self._send_plain(send, 400, b"Disallowed CORS origin")
+            return
+        if request_method not in self.allow_methods:
+            await self._send_plain(send, 400, b"Disallowed CORS method")
+            return
+
+        headers = [allow_origin_header, *self.preflight_headers]
+        if request_headers:
+            # Any request header is allowed, so echo back what was asked for
+            headers.append((b"access-control-allow-headers", request_headers))
+
+        await send({"type": "http.response.start", "status": 204, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+    @staticmethod
+    async def _send_plain(send, status: int, body: bytes):
+        """Send a small plain-text response"""
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                _CONTENT_TYPE_TEXT,
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class UnhandledErrorMiddleware:
+    """Pure ASGI middleware that turns unhandled errors into a JSON 500
+
+    Starlette's own handler for ``Exception`` runs outside every user
+    middleware, so its response never gets CORS headers. Adding this before
+    the CORS middleware keeps the 500 readable by cross-origin clients.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_tracking_start(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_tracking_start)
+        except Exception:
+            # Too late to replace a response that is already on the wire
+            if response_started:
+                raise
+            logger.exception("Request to %s failed", scope["path"])
+            await send({
+                "type": "http.response.start",
+                "status": 500,
+                "headers": [
+                    _CONTENT_TYPE_JSON,
+                    (b"content-length", str(len(_INTERNAL_ERROR_BODY)).encode("latin-1")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _INTERNAL_ERROR_BODY})
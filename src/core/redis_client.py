@@ -0,0 +1,33 @@
+"""
+Shared Redis client for state that every worker process must see
+Used for sync status, sync history and consumed OAuth states
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from .config import settings
+
+
+@lru_cache(maxsize=1)
+def get_shared_store() -> Optional[Redis]:
+    """Return the shared Redis client, or None unless SYNC_STATUS_REDIS is enabled
+    
+    Connections are opened lazily, so the client can be created before the
+    event loop is running.
+    """
+    if not settings.SYNC_STATUS_REDIS:
+        return None
+    return Redis.from_url(settings.REDIS_URL, password=settings.REDIS_PASSWORD or None)
+
+
+async def close_shared_store():
+    """Close the shared Redis client if one was created"""
+    if get_shared_store.cache_info().currsize == 0:
+        return
+    store = get_shared_store()
+    if store is not None:
+        await store.aclose()
+    get_shared_store.cache_clear()
@@ -0,0 +1,31 @@
+"""
+Response classes used by the FastAPI application
+Provides orjson-backed JSON rendering and streaming for API responses
+"""
+
+from typing import Any, AsyncIterable, AsyncIterator
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib json module"""
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            # pydantic-core's compiled serializer writes models straight to bytes
+            return to_json(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+async def stream_json_array(items: AsyncIterable[Any]) -> AsyncIterator[bytes]:
+    """Encode items one at a time as the chunks of a JSON array"""
+    separator = b"["
+    async for item in items:
+        yield separator + orjson.dumps(item, option=orjson.OPT_NON_STR_KEYS)
+        separator = b","
+    # An empty stream still has to produce a valid array
+    yield b"]" if separator == b"," else b"[]"
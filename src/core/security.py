@@ -6,8 +6,14 @@ Implements TLS 1.3 compliance and security best practices
 import jwt
 import secrets
 import hashlib
-from datetime import datetime, timedelta
+import hmac
+import os
+import threading
+import time
+from functools import lru_cache
+from datetime import timedelta
 from typing import Dict, Any, Optional
+from cachetools import TTLCache
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -15,93 +21,209 @@ import base64
 
 from .config import settings
 
+TOKEN_ISSUER = "playlist-sync-service"
+TOKEN_AUDIENCE = "playlist-sync-client"
+_DEFAULT_TOKEN_LIFETIME = timedelta(hours=24)
+
+# (header, validator) pairs checked by validate_request_headers
+_REQUIRED_HEADERS = (
+    ('User-Agent', lambda value: 'playlist-sync' in value.lower()),
+    ('Content-Type', frozenset({'application/json', 'application/x-www-form-urlencoded'}).__contains__),
+)
+
+_ENCRYPTED_V2_PREFIX = "v2:"
+_FERNET_LOCK = threading.Lock()
+_FERNET_SALT = b'stable_salt_for_playlist_sync'  # In production, use random salt per user
+_FERNET_KDF_ITERATIONS = 100000
+
+# Cached token payloads are dropped this many seconds before they expire
+_VERIFY_CACHE_EXPIRY_MARGIN = 5
+
+# scrypt cost parameters for password hashing (~16 MiB, tens of ms per hash)
+_SCRYPT_N = 2 ** 14
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+
+
+class _RandomPool:
+    """Serves random bytes from a buffer refilled in 4 KiB chunks
+    
+    Minting a token ID then costs a slice instead of a getrandom() call. The
+    buffer is dropped in forked children so workers never share bytes.
+    """
+    
+    def __init__(self, refill_size: int = 4096):
+        self._refill_size = refill_size
+        self._buf = b""
+        self._pos = 0
+        self._lock = threading.Lock()
+    
+    def take(self, n: int) -> str:
+        """Take n random bytes, returned as an unpadded URL-safe base64 string"""
+        with self._lock:
+            if len(self._buf) - self._pos < n:
+                self._buf = secrets.token_bytes(max(self._refill_size, n))
+                self._pos = 0
+            chunk = self._buf[self._pos:self._pos + n]
+            self._pos += n
+        return base64.urlsafe_b64encode(chunk).rstrip(b"=").decode()
+    
+    def reset(self):
+        """Discard buffered bytes"""
+        self._buf = b""
+        self._pos = 0
+        self._lock = threading.Lock()
+
+
+_RANDOM_POOL = _RandomPool()
+os.register_at_fork(after_in_child=_RANDOM_POOL.reset)
+
+
+@lru_cache(maxsize=8)
+def _derive_fernet_key(secret_key: str) -> bytes:
+    """Derive the Fernet key for a secret once per process.
+
+    PBKDF2 with 100k iterations is deliberately slow; the salt and iteration
+    count are fixed, so the result only depends on the secret and can be reused
+    by every SecurityManager instance.
+    """
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=_FERNET_SALT,
+        iterations=_FERNET_KDF_ITERATIONS,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(secret_key.encode()))
+
 
 class SecurityManager:
     """Manages security operations for the application"""
     
     def __init__(self):
         self.secret_key = settings.SECRET_KEY
+        # PyJWT encodes str keys on every call; hand it the bytes once
+        self._signing_key = self.secret_key.encode()
         self.algorithm = "HS256"
+        self._algorithms = [self.algorithm]
+        self._static_claims = {
+            "iss": TOKEN_ISSUER,
+            "aud": TOKEN_AUDIENCE
+        }
         self._fernet = None
+        # Cache of verified token payloads: blake2b(token) -> (exp, payload)
+        self._verify_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+        self._verify_lock = threading.Lock()
+        # Build the Fernet instance up front so no request pays for the KDF
+        self._get_fernet()
     
     def _get_fernet(self) -> Fernet:
         """Get or create Fernet encryption instance"""
         if self._fernet is None:
-            # Derive key from secret
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=b'stable_salt_for_playlist_sync',  # In production, use random salt per user
-                iterations=100000,
-            )
-            key = base64.urlsafe_b64encode(kdf.derive(self.secret_key.encode()))
-            self._fernet = Fernet(key)
+            with _FERNET_LOCK:
+                if self._fernet is None:
+                    self._fernet = Fernet(_derive_fernet_key(self.secret_key))
         return self._fernet
     
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """Create a JWT access token with expiration"""
-        to_encode = data.copy()
+        now = int(time.time())
+        expire = now + int((expires_delta or _DEFAULT_TOKEN_LIFETIME).total_seconds())
         
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(hours=24)
-        
-        to_encode.update({
+        to_encode = {
+            **data,
+            **self._static_claims,
             "exp": expire,
-            "iat": datetime.utcnow(),
-            "jti": secrets.token_urlsafe(32),  # JWT ID for token invalidation
-            "iss": "playlist-sync-service",
-            "aud": "playlist-sync-client"
-        })
+            "iat": now,
+            "jti": _RANDOM_POOL.take(32),  # JWT ID for token invalidation
+        }
         
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
-        return encoded_jwt
+        return jwt.encode(to_encode, self._signing_key, algorithm=self.algorithm)
     
     def verify_token(self, token: str) -> Dict[str, Any]:
-        """Verify and decode a JWT token"""
+        """Verify and decode a JWT token
+        
+        Verified payloads are cached by token digest until shortly before they
+        expire, so clients reusing a bearer token skip signature verification.
+        The returned payload is shared between callers and must not be mutated.
+        """
+        cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        with self._verify_lock:
+            cached = self._verify_cache.get(cache_key)
+        if cached is not None and time.time() < cached[0] - _VERIFY_CACHE_EXPIRY_MARGIN:
+            return cached[1]
+        
         try:
             payload = jwt.decode(
                 token, 
-                self.secret_key, 
-                algorithms=[self.algorithm],
-                audience="playlist-sync-client",
-                issuer="playlist-sync-service"
+                self._signing_key, 
+                algorithms=self._algorithms,
+                audience=TOKEN_AUDIENCE,
+                issuer=TOKEN_ISSUER
             )
-            return payload
         except jwt.ExpiredSignatureError:
             raise SecurityException("Token has expired")
-        except jwt.JWTError as e:
+        except jwt.InvalidTokenError as e:
             raise SecurityException(f"Token verification failed: {str(e)}")
+        
+        with self._verify_lock:
+            self._verify_cache[cache_key] = (payload["exp"], payload)
+        return payload
     
     def encrypt_sensitive_data(self, data: str) -> str:
         """Encrypt sensitive data like tokens"""
         fernet = self._get_fernet()
-        encrypted = fernet.encrypt(data.encode())
-        return base64.urlsafe_b64encode(encrypted).decode()
+        # Fernet tokens are already URL-safe base64, so they are stored as-is
+        return _ENCRYPTED_V2_PREFIX + fernet.encrypt(data.encode()).decode("ascii")
     
     def decrypt_sensitive_data(self, encrypted_data: str) -> str:
         """Decrypt sensitive data"""
         try:
             fernet = self._get_fernet()
-            encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
+            if encrypted_data.startswith(_ENCRYPTED_V2_PREFIX):
+                encrypted_bytes = encrypted_data[len(_ENCRYPTED_V2_PREFIX):].encode("ascii")
+            else:
+                # Legacy values wrapped the Fernet token in a second base64 layer
+                encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
             decrypted = fernet.decrypt(encrypted_bytes)
             return decrypted.decode()
         except Exception as e:
             raise SecurityException(f"Decryption failed: {str(e)}")
     
     def hash_password(self, password: str) -> str:
-        """Hash a password with salt"""
-        salt = secrets.token_hex(32)
-        pwdhash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
-        return salt + pwdhash.hex()
+        """Hash a password with salt using scrypt (OpenSSL-backed, memory-hard)"""
+        salt = secrets.token_bytes(16)
+        pwdhash = hashlib.scrypt(
+            password.encode('utf-8'),
+            salt=salt,
+            n=_SCRYPT_N,
+            r=_SCRYPT_R,
+            p=_SCRYPT_P,
+            dklen=32,
+        )
+        return f"scrypt${_SCRYPT_N}${_SCRYPT_R}${_SCRYPT_P}${salt.hex()}${pwdhash.hex()}"
     
     def verify_password(self, password: str, stored_hash: str) -> bool:
         """Verify a password against its hash"""
+        if stored_hash.startswith("scrypt$"):
+            try:
+                _, n, r, p, salt, stored_pwdhash = stored_hash.split("$")
+                pwdhash = hashlib.scrypt(
+                    password.encode('utf-8'),
+                    salt=bytes.fromhex(salt),
+                    n=int(n),
+                    r=int(r),
+                    p=int(p),
+                    dklen=32,
+                )
+            except ValueError:
+                return False
+            return hmac.compare_digest(pwdhash.hex(), stored_pwdhash)
+        
+        # Legacy format: 64 hex chars of salt followed by the PBKDF2-SHA256 hash
         salt = stored_hash[:64]
         stored_pwdhash = stored_hash[64:]
         pwdhash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
-        return pwdhash.hex() == stored_pwdhash
+        return hmac.compare_digest(pwdhash.hex(), stored_pwdhash)
     
     def generate_secure_token(self, length: int = 32) -> str:
         """Generate a cryptographically secure random token"""
@@ -109,13 +231,9 @@ class SecurityManager:
     
     def validate_request_headers(self, headers: Dict[str, str]) -> bool:
         """Validate security headers in requests"""
-        required_headers = {
-            'User-Agent': lambda x: len(x) > 0 and 'playlist-sync' in x.lower(),
-            'Content-Type': lambda x: x in ['application/json', 'application/x-www-form-urlencoded']
-        }
-        
-        for header, validator in required_headers.items():
-            if header not in headers or not validator(headers[header]):
+        for header, validator in _REQUIRED_HEADERS:
+            value = headers.get(header)
+            if value is None or not validator(value):
                 return False
         
         return True
@@ -0,0 +1,41 @@
+"""
+Static file serving for the React frontend
+Serves built assets and falls back to the SPA shell for client-side routes
+"""
+
+from typing import Callable, Iterable
+
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+
+class SPAStaticFiles(StaticFiles):
+    """StaticFiles that answers unknown paths with the single-page app shell"""
+
+    def __init__(
+        self,
+        *,
+        fallback: Callable[[Request], Response],
+        excluded_prefixes: Iterable[str] = (),
+        excluded_paths: Iterable[str] = (),
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.fallback = fallback
+        self.excluded_prefixes = tuple(excluded_prefixes)
+        self.excluded_paths = frozenset(excluded_paths)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        # Reserved paths never resolve to a file or the SPA shell
+        if path in self.excluded_paths or path.startswith(self.excluded_prefixes):
+            raise HTTPException(status_code=404)
+
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as e:
+            if e.status_code != 404:
+                raise
+        return self.fallback(Request(scope))
@@ -3,56 +3,194 @@ Spotify to Apple Music Playlist Sync Service
 Main FastAPI application entry point
 """
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import List, Optional
+from starlette.middleware.gzip import GZipMiddleware
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+import hashlib
+import html
 import logging
 import os
-from datetime import datetime
-
-from .services.spotify_service import SpotifyService
-from .services.apple_music_service import AppleMusicService
-from .services.playlist_sync_service import PlaylistSyncService
-from .services.auth_service import AuthService
-from .services.demo_service import DemoService
-from .models.playlist import PlaylistResponse, SyncRequest, SyncResponse
+import time
+import orjson
+
+from .services.spotify_service import SpotifyService, get_spotify_service
+from .services.playlist_sync_service import PlaylistSyncService, get_playlist_sync_service
+from .services.auth_service import AuthService, get_auth_service
+from .services.demo_service import DemoService, get_demo_service
+from .models.playlist import PlaylistResponse, SyncRequest, SyncResponse, SyncStatus
 from .core.config import settings
-from .core.security import verify_token
+from .core.http_client import close_client_sessions
+from .core.redis_client import close_shared_store
+from .core.security import SecurityException, verify_token
+from .core.responses import ORJSONResponse, stream_json_array
+from .core.routing import ORJSONRoute
+from .core.middleware import FastCORSMiddleware, UnhandledErrorMiddleware
+from .core.staticfiles import SPAStaticFiles
 
-# Configure logging
-logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL.upper()))
+# Configure logging - resolve the level name once and fail fast on typos
+LOG_LEVEL_NAME = settings.LOG_LEVEL.upper()
+LOG_LEVEL = logging.getLevelNamesMapping()[LOG_LEVEL_NAME]
+logging.basicConfig(level=LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close pooled outbound HTTP sessions and the shared Redis client on shutdown"""
+    yield
+    await close_client_sessions()
+    await close_shared_store()
+
 app = FastAPI(
     title="Spotify-Apple Music Playlist Sync",
     description="Microservice for syncing playlists between Spotify and Apple Music",
     version="1.0.0",
     docs_url="/api/docs",  # Enable docs for testing
     redoc_url="/api/redoc",  # Enable redoc for testing
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
+# Must be set before any route is registered
+app.router.route_class = ORJSONRoute
+
+# OAuth popup pages - values are substituted with _js_literal/html.escape
+_AUTH_SUCCESS_HTML = """
+<html>
+    <body>
+        <script>
+            window.opener.postMessage({{
+                type: 'AUTH_SUCCESS',
+                token: {token},
+                user: {user}
+            }}, window.location.origin);
+            window.close();
+        </script>
+        <p>Authentication successful! You can close this window.</p>
+    </body>
+</html>
+"""
+
+_AUTH_ERROR_HTML = """
+<html>
+    <body>
+        <script>
+            window.opener.postMessage({{
+                type: 'AUTH_ERROR',
+                error: {error}
+            }}, window.location.origin);
+            window.close();
+        </script>
+        <p>Authentication failed: {message}</p>
+    </body>
+</html>
+"""
+
+_AUTH_FAILED_HTML = """
+<html>
+    <body>
+        <script>
+            window.opener.postMessage({{
+                type: 'AUTH_ERROR',
+                error: 'Authentication failed'
+            }}, window.location.origin);
+            window.close();
+        </script>
+        <p>Authentication failed: {detail}</p>
+    </body>
+</html>
+"""
+
+
+def _js_literal(value) -> str:
+    """Serialize a value as a JS literal that is safe inside a <script> block"""
+    return (
+        orjson.dumps(value).decode()
+        .replace("<", "\\u003c")
+        .replace(">", "\\u003e")
+        .replace("&", "\\u0026")
+    )
+
+# OAuth providers accepted by the auth redirect endpoint
+_ALLOWED_PROVIDERS = frozenset({"spotify", "apple-music"})
+
+# Status payloads serialized once - only the timestamp is spliced in per request
+_ROOT_BODY = (
+    b'{"service":"Spotify-Apple Music Playlist Sync","version":"1.0.0","status":"running","timestamp":"',
+    b'","docs":"/api/docs","health":"/health"}'
+)
+_HEALTH_BODY = (
+    b'{"status":"healthy","timestamp":"',
+    b'","service":"playlist-sync","version":"1.0.0"}'
+)
+
+
+# UTC timestamp for status payloads, reformatted only when the second changes
+_timestamp_second = 0
+_timestamp_iso = b""
+
+
+def _current_timestamp() -> bytes:
+    """Return the current UTC time as ISO-8601 bytes with second resolution"""
+    global _timestamp_second, _timestamp_iso
+    now = int(time.time())
+    if now != _timestamp_second:
+        _timestamp_second = now
+        _timestamp_iso = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(now)).encode()
+    return _timestamp_iso
+
+
+def _timestamped_json(body: tuple) -> Response:
+    """Build a JSON response from a prebuilt body and the current timestamp"""
+    prefix, suffix = body
+    return Response(content=prefix + _current_timestamp() + suffix, media_type="application/json")
 
 # Security middleware
 security = HTTPBearer()
 
+async def get_token_payload(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Dict[str, Any]:
+    """Verify the bearer token once per request and return its payload"""
+    try:
+        return verify_token(credentials.credentials)
+    except SecurityException as e:
+        raise HTTPException(
+            status_code=401,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+class DomainError(Exception):
+    """Endpoint failure reported to the client with a specific detail message"""
+    
+    def __init__(self, detail: str, status_code: int = 500):
+        Exception.__init__(self, detail)
+        self.detail = detail
+        self.status_code = status_code
+
+@app.exception_handler(DomainError)
+async def domain_error_handler(request: Request, exc: DomainError) -> ORJSONResponse:
+    """Log the underlying failure and return the endpoint's detail message"""
+    logger.exception("%s on %s", exc.detail, request.url.path, exc_info=exc)
+    return ORJSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+# Any other error becomes a generic 500 inside the CORS middleware,
+# so cross-origin clients can still read it
+app.add_middleware(UnhandledErrorMiddleware)
+
 # CORS middleware
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.allowed_origins_list,
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE"],
-    allow_headers=["*"],
+    FastCORSMiddleware,
+    allowed_origins=settings.allowed_origins_list,
+    allow_methods=("GET", "POST", "PUT", "DELETE"),
 )
 
-# Initialize services
-spotify_service = SpotifyService()
-apple_music_service = AppleMusicService()
-playlist_sync_service = PlaylistSyncService(spotify_service, apple_music_service)
-auth_service = AuthService()
-demo_service = DemoService()
+# Compress larger responses (playlist lists, history, frontend bundles);
+# small payloads like /health stay under minimum_size and are sent as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # Static directory path
 static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
@@ -63,158 +201,143 @@ if os.path.exists(static_dir):
     if os.path.exists(react_static_dir):
         app.mount("/static", StaticFiles(directory=react_static_dir), name="react_static")
 
-# Individual routes for React assets
-@app.get("/favicon.ico")
-async def favicon():
-    return FileResponse(os.path.join(static_dir, "favicon.ico"))
+# The SPA shell is read once at startup and served from memory
+index_file = os.path.join(static_dir, 'index.html')
 
-@app.get("/manifest.json")
-async def manifest():
-    return FileResponse(os.path.join(static_dir, "manifest.json"))
+def _load_index_html() -> Optional[bytes]:
+    """Read the built React index.html once, or None if the frontend is missing"""
+    try:
+        with open(index_file, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
 
-@app.get("/logo192.png")
-async def logo192():
-    return FileResponse(os.path.join(static_dir, "logo192.png"))
+_INDEX_HTML = _load_index_html()
+_INDEX_ETAG = f'"{hashlib.md5(_INDEX_HTML, usedforsecurity=False).hexdigest()}"' if _INDEX_HTML is not None else None
+_INDEX_HEADERS = {"etag": _INDEX_ETAG, "cache-control": "no-cache"} if _INDEX_ETAG else {}
+logger.info(f"Frontend index {index_file} loaded: {_INDEX_HTML is not None}")
 
-@app.get("/logo512.png")
-async def logo512():
-    return FileResponse(os.path.join(static_dir, "logo512.png"))
+def _index_response(request: Request) -> Response:
+    """Serve the cached index.html, honouring If-None-Match"""
+    if request.headers.get("if-none-match") == _INDEX_ETAG:
+        return Response(status_code=304, headers=_INDEX_HEADERS)
+    return Response(content=_INDEX_HTML, media_type="text/html", headers=_INDEX_HEADERS)
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Serve React app at root"""
-    static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
-    index_file = os.path.join(static_dir, 'index.html')
-    
-    if os.path.exists(index_file):
-        return FileResponse(index_file)
-    else:
-        return {
-            "service": "Spotify-Apple Music Playlist Sync",
-            "version": "1.0.0",
-            "status": "running",
-            "timestamp": datetime.utcnow().isoformat(),
-            "docs": "/api/docs",
-            "health": "/health"
-        }
+    if _INDEX_HTML is not None:
+        return _index_response(request)
+    return _timestamped_json(_ROOT_BODY)
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "service": "playlist-sync",
-        "version": "1.0.0"
-    }
-
-@app.get("/api/spotify/playlists")
+    return _timestamped_json(_HEALTH_BODY)
+
+@app.get("/api/spotify/playlists", response_model=List[PlaylistResponse])
 async def get_spotify_playlists(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> List[PlaylistResponse]:
+    token: Dict[str, Any] = Depends(get_token_payload),
+    spotify_service: SpotifyService = Depends(get_spotify_service)
+):
     """Get user's Spotify playlists"""
     try:
-        token = verify_token(credentials.credentials)
         playlists = await spotify_service.get_user_playlists(token["spotify_token"])
-        return [PlaylistResponse(**playlist) for playlist in playlists]
     except Exception as e:
-        logger.error(f"Failed to get Spotify playlists: {e}")
-        raise HTTPException(status_code=500, detail="Failed to fetch Spotify playlists")
+        raise DomainError("Failed to fetch Spotify playlists") from e
+    # Service dicts already match PlaylistResponse; returning a Response skips
+    # re-validation while response_model keeps the documented schema
+    return ORJSONResponse(content=playlists)
 
-@app.post("/api/sync/playlist")
+@app.post("/api/sync/playlist", response_model=SyncResponse)
 async def sync_playlist(
     sync_request: SyncRequest,
-    background_tasks: BackgroundTasks,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> SyncResponse:
+    token: Dict[str, Any] = Depends(get_token_payload),
+    playlist_sync_service: PlaylistSyncService = Depends(get_playlist_sync_service)
+):
     """Sync a Spotify playlist to Apple Music"""
+    # Start background sync process
     try:
-        token = verify_token(credentials.credentials)
-        
-        # Start background sync process
         task_id = await playlist_sync_service.start_sync(
             spotify_playlist_id=sync_request.spotify_playlist_id,
             apple_music_token=token["apple_music_token"],
             spotify_token=token["spotify_token"],
             create_new=sync_request.create_new_playlist
         )
-        
-        return SyncResponse(
-            task_id=task_id,
-            status="started",
-            message="Playlist sync initiated successfully"
-        )
     except Exception as e:
-        logger.error(f"Failed to sync playlist: {e}")
-        raise HTTPException(status_code=500, detail="Failed to start playlist sync")
+        raise DomainError("Failed to start playlist sync") from e
+    
+    # Values come from our own service; returning a Response skips re-validation
+    # while response_model keeps the documented schema
+    return ORJSONResponse(content={
+        "task_id": task_id,
+        "status": SyncStatus.PENDING,
+        "message": "Playlist sync initiated successfully"
+    })
 
 @app.get("/api/sync/status/{task_id}")
 async def get_sync_status(
     task_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    token: Dict[str, Any] = Depends(get_token_payload),
+    playlist_sync_service: PlaylistSyncService = Depends(get_playlist_sync_service)
 ):
     """Get the status of a playlist sync operation"""
+    # Polled frequently; track results are kept pre-encoded, so each poll only
+    # encodes the small status header
     try:
-        token = verify_token(credentials.credentials)
-        status = await playlist_sync_service.get_sync_status(task_id)
-        return status
+        status = await playlist_sync_service.get_sync_status_json(task_id)
     except Exception as e:
-        logger.error(f"Failed to get sync status: {e}")
-        raise HTTPException(status_code=500, detail="Failed to retrieve sync status")
+        raise DomainError("Failed to retrieve sync status") from e
+    return Response(content=status or b"null", media_type="application/json")
 
 @app.get("/api/sync/history")
 async def get_sync_history(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    token: Dict[str, Any] = Depends(get_token_payload),
+    playlist_sync_service: PlaylistSyncService = Depends(get_playlist_sync_service)
 ):
     """Get user's sync history"""
-    try:
-        token = verify_token(credentials.credentials)
-        history = await playlist_sync_service.get_sync_history(token["user_id"])
-        return history
-    except Exception as e:
-        logger.error(f"Failed to get sync history: {e}")
-        raise HTTPException(status_code=500, detail="Failed to retrieve sync history")
+    return StreamingResponse(
+        stream_json_array(playlist_sync_service.iter_sync_history(token["user_id"])),
+        media_type="application/json"
+    )
 
 # OAuth Authentication Endpoints
 @app.get("/api/auth/{provider}")
-async def auth_redirect(provider: str, request: Request):
+async def auth_redirect(
+    provider: str,
+    request: Request,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """Redirect to OAuth provider"""
+    if provider not in _ALLOWED_PROVIDERS:
+        raise HTTPException(status_code=400, detail="Unsupported provider")
+    
+    # Use the request's origin as base for redirect URI
+    redirect_uri = f"{request.base_url}api/auth/{provider}/callback"
+    
     try:
-        if provider not in ['spotify', 'apple-music']:
-            raise HTTPException(status_code=400, detail="Unsupported provider")
-        
-        # Use the request's origin as base for redirect URI
-        redirect_uri = f"{request.base_url}api/auth/{provider}/callback"
-        
         oauth_data = auth_service.generate_oauth_url(provider, str(redirect_uri))
-        
-        return RedirectResponse(url=oauth_data["auth_url"])
     except Exception as e:
-        logger.error(f"OAuth redirect failed for {provider}: {e}")
-        raise HTTPException(status_code=500, detail="Failed to initiate OAuth")
+        raise DomainError("Failed to initiate OAuth") from e
+    
+    return RedirectResponse(url=oauth_data["auth_url"])
 
 @app.get("/api/auth/{provider}/callback")
-async def auth_callback(provider: str, code: str = None, state: str = None, error: str = None):
+async def auth_callback(
+    provider: str,
+    code: str = None,
+    state: str = None,
+    error: str = None,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """Handle OAuth callback"""
     try:
         if error:
             logger.error(f"OAuth error for {provider}: {error}")
-            return HTMLResponse(
-                content=f"""
-                <html>
-                    <body>
-                        <script>
-                            window.opener.postMessage({{ 
-                                type: 'AUTH_ERROR', 
-                                error: '{error}' 
-                            }}, window.location.origin);
-                            window.close();
-                        </script>
-                        <p>Authentication failed: {error}</p>
-                    </body>
-                </html>
-                """
-            )
+            return HTMLResponse(content=_AUTH_ERROR_HTML.format(
+                error=_js_literal(error),
+                message=html.escape(error)
+            ))
         
         if not code or not state:
             raise HTTPException(status_code=400, detail="Missing required parameters")
@@ -222,145 +345,106 @@ async def auth_callback(provider: str, code: str = None, state: str = None, erro
         auth_result = await auth_service.handle_oauth_callback(provider, code, state)
         
         # Return HTML that posts message to parent window
-        return HTMLResponse(
-            content=f"""
-            <html>
-                <body>
-                    <script>
-                        window.opener.postMessage({{ 
-                            type: 'AUTH_SUCCESS', 
-                            token: '{auth_result["token"]}',
-                            user: {auth_result["user"]} 
-                        }}, window.location.origin);
-                        window.close();
-                    </script>
-                    <p>Authentication successful! You can close this window.</p>
-                </body>
-            </html>
-            """
-        )
+        return HTMLResponse(content=_AUTH_SUCCESS_HTML.format(
+            token=_js_literal(auth_result["token"]),
+            user=_js_literal(auth_result["user"])
+        ))
     except Exception as e:
         logger.error(f"OAuth callback failed for {provider}: {e}")
-        return HTMLResponse(
-            content=f"""
-            <html>
-                <body>
-                    <script>
-                        window.opener.postMessage({{ 
-                            type: 'AUTH_ERROR', 
-                            error: 'Authentication failed' 
-                        }}, window.location.origin);
-                        window.close();
-                    </script>
-                    <p>Authentication failed: {str(e)}</p>
-                </body>
-            </html>
-            """
-        )
+        return HTMLResponse(content=_AUTH_FAILED_HTML.format(detail=html.escape(str(e))))
 
 @app.get("/api/user/profile")
 async def get_user_profile(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    token: Dict[str, Any] = Depends(get_token_payload),
+    auth_service: AuthService = Depends(get_auth_service),
+    demo_service: DemoService = Depends(get_demo_service)
 ):
     """Get current user profile"""
+    user_id = token["user_id"]
+    
+    # Check if demo mode
     try:
-        token = verify_token(credentials.credentials)
-        user_id = token["user_id"]
-        
-        # Check if demo mode
         if token.get("demo_mode"):
             profile = demo_service.get_demo_user_profile(user_id)
         else:
             profile = auth_service.get_user_profile(user_id)
-        
-        if not profile:
-            raise HTTPException(status_code=404, detail="User profile not found")
-        
-        return profile
     except Exception as e:
-        logger.error(f"Failed to get user profile: {e}")
-        raise HTTPException(status_code=500, detail="Failed to retrieve user profile")
+        raise DomainError("Failed to retrieve user profile") from e
+    
+    if not profile:
+        raise HTTPException(status_code=404, detail="User profile not found")
+    
+    return profile
 
 # Demo Mode Endpoints
 @app.post("/api/demo/login")
-async def demo_login():
+async def demo_login(demo_service: DemoService = Depends(get_demo_service)):
     """Create a demo user session for testing"""
     try:
         demo_auth = demo_service.create_demo_user()
-        return demo_auth
     except Exception as e:
-        logger.error(f"Demo login failed: {e}")
-        raise HTTPException(status_code=500, detail="Failed to create demo session")
+        raise DomainError("Failed to create demo session") from e
+    return demo_auth
 
 @app.get("/api/demo/playlists")
 async def get_demo_playlists(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    token: Dict[str, Any] = Depends(get_token_payload),
+    demo_service: DemoService = Depends(get_demo_service)
 ):
     """Get demo Spotify playlists"""
+    if not token.get("demo_mode"):
+        raise HTTPException(status_code=403, detail="Demo mode required")
+    
     try:
-        token = verify_token(credentials.credentials)
-        if not token.get("demo_mode"):
-            raise HTTPException(status_code=403, detail="Demo mode required")
-        
         playlists = demo_service.get_demo_playlists()
-        return playlists
     except Exception as e:
-        logger.error(f"Failed to get demo playlists: {e}")
-        raise HTTPException(status_code=500, detail="Failed to retrieve demo playlists")
+        raise DomainError("Failed to retrieve demo playlists") from e
+    return playlists
 
 @app.post("/api/demo/sync")
 async def demo_sync_playlist(
     sync_request: SyncRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    token: Dict[str, Any] = Depends(get_token_payload),
+    demo_service: DemoService = Depends(get_demo_service)
 ):
     """Simulate playlist sync in demo mode"""
+    if not token.get("demo_mode"):
+        raise HTTPException(status_code=403, detail="Demo mode required")
+    
     try:
-        token = verify_token(credentials.credentials)
-        if not token.get("demo_mode"):
-            raise HTTPException(status_code=403, detail="Demo mode required")
-        
         result = demo_service.simulate_sync(sync_request.spotify_playlist_id)
-        return result
     except Exception as e:
-        logger.error(f"Demo sync failed: {e}")
-        raise HTTPException(status_code=500, detail="Failed to simulate sync")
+        raise DomainError("Failed to simulate sync") from e
+    return result
 
 @app.get("/api/demo/history")
 async def get_demo_sync_history(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    token: Dict[str, Any] = Depends(get_token_payload),
+    demo_service: DemoService = Depends(get_demo_service)
 ):
     """Get demo sync history"""
+    if not token.get("demo_mode"):
+        raise HTTPException(status_code=403, detail="Demo mode required")
+    
     try:
-        token = verify_token(credentials.credentials)
-        if not token.get("demo_mode"):
-            raise HTTPException(status_code=403, detail="Demo mode required")
-        
         history = demo_service.get_demo_sync_history()
-        return history
     except Exception as e:
-        logger.error(f"Failed to get demo history: {e}")
-        raise HTTPException(status_code=500, detail="Failed to retrieve demo history")
-
-# Catch-all route to serve React app (must be last)
-@app.get("/{path:path}")
-async def serve_frontend(path: str = ""):
-    """Serve React frontend for all non-API routes"""
-    # Don't serve frontend for API routes
-    if path.startswith("api/") or path == "health" or path == "docs" or path == "redoc" or path == "openapi.json":
-        raise HTTPException(status_code=404, detail="Not Found")
-    
-    # Serve index.html for React routing
-    index_file = os.path.join(static_dir, 'index.html')
-    logger.info(f"Looking for static files in: {static_dir}")
-    logger.info(f"Index file path: {index_file}")
-    logger.info(f"Index file exists: {os.path.exists(index_file)}")
-    
-    if os.path.exists(index_file):
-        return FileResponse(index_file)
-    else:
-        # Fallback if no frontend is built - serve a helpful page
-        return HTMLResponse(
-            content=f"""
+        raise DomainError("Failed to retrieve demo history") from e
+    return history
+
+def _scan_static_dir() -> Optional[List[str]]:
+    """List the static directory in a single scandir pass, or None if missing"""
+    try:
+        with os.scandir(static_dir) as entries:
+            return sorted(entry.name for entry in entries)
+    except FileNotFoundError:
+        return None
+
+def _build_fallback_page() -> str:
+    """Render the page shown when no frontend build is present"""
+    # One directory scan answers both "does it exist" and "what's in it"
+    static_files = _scan_static_dir()
+    return f"""
             <!DOCTYPE html>
             <html>
                 <head>
@@ -406,16 +490,48 @@ async def serve_frontend(path: str = ""):
                             <strong>Debug Info:</strong><br>
                             Static Directory: {static_dir}<br>
                             Index File: {index_file}<br>
-                            Directory Exists: {os.path.exists(static_dir)}<br>
-                            Index File Exists: {os.path.exists(index_file)}<br>
+                            Directory Exists: {static_files is not None}<br>
+                            Index File Exists: {_INDEX_HTML is not None}<br>
                             Working Directory: {os.getcwd()}<br>
-                            Files in static dir: {os.listdir(static_dir) if os.path.exists(static_dir) else 'Directory not found'}
+                            Files in static dir: {html.escape(str(static_files)) if static_files is not None else 'Directory not found'}
                         </div>
                     </div>
                 </body>
             </html>
-            """,
-            media_type="text/html"
-        )
+            """
+
+_FALLBACK_HTML = _build_fallback_page() if _INDEX_HTML is None else None
+
+# Paths under the frontend catch-all that must never serve the SPA shell
+_RESERVED_PREFIXES = ("api/",)
+_RESERVED_PATHS = frozenset({"health", "docs", "redoc", "openapi.json"})
+
+def _frontend_fallback(request: Request) -> Response:
+    """Serve the SPA shell, or the helpful page if no frontend is built"""
+    if _INDEX_HTML is not None:
+        return _index_response(request)
+    return HTMLResponse(content=_FALLBACK_HTML)
+
+# Catch-all for the React app (must be last) - StaticFiles serves built assets
+# directly and answers client-side routes with index.html
+if os.path.isdir(static_dir):
+    app.mount(
+        "/",
+        SPAStaticFiles(
+            directory=static_dir,
+            html=True,
+            fallback=_frontend_fallback,
+            excluded_prefixes=_RESERVED_PREFIXES,
+            excluded_paths=_RESERVED_PATHS
+        ),
+        name="spa"
+    )
+else:
+    @app.get("/{path:path}")
+    async def serve_frontend(request: Request, path: str = ""):
+        """Serve the no-frontend page for all non-API routes"""
+        if path in _RESERVED_PATHS or path.startswith(_RESERVED_PREFIXES):
+            raise HTTPException(status_code=404, detail="Not Found")
+        return _frontend_fallback(request)
 
 # No direct uvicorn execution - use Procfile for deployment
@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
+from typing_extensions import NotRequired, TypedDict
 
 class SyncStatus(str, Enum):
     PENDING = "pending"
@@ -14,16 +15,19 @@ class SyncStatus(str, Enum):
     FAILED = "failed"
     PARTIAL = "partial"
 
-class TrackResponse(BaseModel):
+# Per-track carriers are TypedDicts rather than nested models: a sync can hold
+# thousands of them, and pydantic validates and serializes TypedDicts without
+# allocating a model instance per track
+class TrackResponse(TypedDict):
     """Track information response model"""
     id: str
     name: str
     artist: str
     album: str
     duration_ms: int
-    isrc: Optional[str] = None
-    preview_url: Optional[str] = None
-    external_urls: Dict[str, str] = {}
+    isrc: NotRequired[Optional[str]]
+    preview_url: NotRequired[Optional[str]]
+    external_urls: NotRequired[Dict[str, str]]
 
 class PlaylistResponse(BaseModel):
     """Playlist information response model"""
@@ -37,6 +41,9 @@ class PlaylistResponse(BaseModel):
     external_urls: Dict[str, str] = {}
     images: List[Dict[str, Any]] = []
 
+# Trust boundary: models filled from client input (SyncRequest) are always
+# validated. Response models filled from data the services already built may
+# use model_construct() to skip validation.
 class SyncRequest(BaseModel):
     """Request model for playlist sync operation"""
     spotify_playlist_id: str = Field(..., description="Spotify playlist ID to sync")
@@ -51,12 +58,12 @@ class SyncResponse(BaseModel):
     message: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-class TrackSyncResult(BaseModel):
+class TrackSyncResult(TypedDict):
     """Result of syncing a single track"""
     spotify_track: TrackResponse
-    apple_music_track: Optional[TrackResponse] = None
+    apple_music_track: NotRequired[Optional[TrackResponse]]
     status: str  # "success", "not_found", "error"
-    error_message: Optional[str] = None
+    error_message: NotRequired[Optional[str]]
 
 class SyncStatusResponse(BaseModel):
     """Detailed sync status response"""
@@ -6,41 +6,84 @@ Handles authentication, playlist creation, and track search with comprehensive e
 import asyncio
 import aiohttp
 import logging
+from functools import lru_cache, partial
 import jwt
-from typing import List, Dict, Optional, Any
-from datetime import datetime, timedelta
-import json
+import time
+from collections import deque
+from difflib import SequenceMatcher
+from cachetools import TTLCache
+from typing import Deque, List, Dict, Optional, Any, Tuple
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+import orjson
 
-from ..core.config import settings, TLS_CONFIG
+from ..core.config import settings
+from ..core.http_client import create_client_session
 from ..models.playlist import TrackResponse, PlaylistResponse
 from .exceptions import APIException, RateLimitException, AuthenticationException, TrackNotFoundError
 
 logger = logging.getLogger(__name__)
 
+
+def _difflib_similarity(a: str, b: str) -> float:
+    """Return the similarity of two strings between 0.0 and 1.0"""
+    return SequenceMatcher(None, a, b).ratio()
+
+
+try:
+    # rapidfuzz is optional. Its Indel similarity is 2 * LCS / (len(a) + len(b)),
+    # while difflib's ratio() only counts greedily found matching blocks, so
+    # rapidfuzz scores are never lower and can be higher for the same strings
+    from rapidfuzz.distance.Indel import normalized_similarity as _similarity
+except ImportError:
+    _similarity = _difflib_similarity
+
+# Catalog search results rarely change, so matches are reused for a day
+SEARCH_CACHE_TTL_SECONDS = 24 * 60 * 60
+SEARCH_CACHE_SIZE = 50_000
+
+# Developer tokens are valid for 6 hours and refreshed 30 minutes early
+DEVELOPER_TOKEN_LIFETIME_SECONDS = 6 * 60 * 60
+DEVELOPER_TOKEN_REFRESH_SECONDS = DEVELOPER_TOKEN_LIFETIME_SECONDS - 30 * 60
+
+@lru_cache(maxsize=4)
+def _load_signing_key(private_key_pem: str) -> ec.EllipticCurvePrivateKey:
+    """Parse the Apple Music ES256 private key once per distinct PEM"""
+    return serialization.load_pem_private_key(private_key_pem.encode(), password=None)
+
 class AppleMusicRateLimiter:
     """Rate limiter for Apple Music API calls"""
     
     def __init__(self, max_requests: int = 333, window_seconds: int = 60):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests = []
+        # Monotonic request timestamps, oldest first
+        self.requests: Deque[float] = deque()
+        # Concurrent callers take turns, so each one sees the slots taken before it
+        self._lock = asyncio.Lock()
+    
+    def _expire(self, now: float):
+        """Remove requests that have left the window"""
+        cutoff = now - self.window_seconds
+        while self.requests and self.requests[0] <= cutoff:
+            self.requests.popleft()
     
     async def acquire(self):
         """Acquire permission to make a request"""
-        now = datetime.utcnow()
-        # Remove old requests outside the window
-        self.requests = [req_time for req_time in self.requests 
-                        if now - req_time < timedelta(seconds=self.window_seconds)]
-        
-        if len(self.requests) >= self.max_requests:
-            # Wait until we can make another request
-            oldest_request = min(self.requests)
-            wait_time = (oldest_request + timedelta(seconds=self.window_seconds) - now).total_seconds()
-            if wait_time > 0:
+        async with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            
+            # Re-check after every wait - a slot is only free once the window has room
+            while len(self.requests) >= self.max_requests:
+                # Wait until the oldest request leaves the window
+                wait_time = self.requests[0] + self.window_seconds - now
                 logger.warning(f"Rate limit reached, waiting {wait_time:.2f} seconds")
                 await asyncio.sleep(wait_time)
-        
-        self.requests.append(now)
+                now = time.monotonic()
+                self._expire(now)
+            
+            self.requests.append(now)
 
 class AppleMusicService:
     """Service for interacting with Apple Music API"""
@@ -49,7 +92,26 @@ class AppleMusicService:
         self.base_url = "https://api.music.apple.com/v1"
         self.rate_limiter = AppleMusicRateLimiter(settings.APPLE_MUSIC_RATE_LIMIT, 60)
         self._developer_token = None
-        self._token_expiry = None
+        self._token_expiry = 0.0  # time.monotonic() deadline for reusing the token
+        # Headers shared by every request made with the current developer token
+        self._headers_token: Optional[str] = None
+        self._base_headers: Dict[str, str] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Catalog search results keyed by normalized query, plus searches still running
+        self._search_cache: TTLCache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL_SECONDS)
+        self._inflight_searches: Dict[Tuple[str, ...], asyncio.Task] = {}
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = create_client_session()
+        return self._session
+    
+    async def close(self):
+        """Close the pooled HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     def _generate_developer_token(self) -> str:
         """Generate JWT token for Apple Music API authentication"""
@@ -57,11 +119,11 @@ class AppleMusicService:
             raise AuthenticationException("Apple Music API credentials not configured")
         
         try:
-            # JWT payload
+            now = int(time.time())
             payload = {
                 'iss': settings.APPLE_MUSIC_TEAM_ID,
-                'iat': int(datetime.utcnow().timestamp()),
-                'exp': int((datetime.utcnow() + timedelta(hours=6)).timestamp()),
+                'iat': now,
+                'exp': now + DEVELOPER_TOKEN_LIFETIME_SECONDS,
                 'aud': 'appstoreconnect-v1'
             }
             
@@ -71,10 +133,10 @@ class AppleMusicService:
                 'kid': settings.APPLE_MUSIC_KEY_ID
             }
             
-            # Generate token
+            # Sign with the already-parsed key so PyJWT skips PEM parsing
             token = jwt.encode(
                 payload, 
-                settings.APPLE_MUSIC_PRIVATE_KEY, 
+                _load_signing_key(settings.APPLE_MUSIC_PRIVATE_KEY), 
                 algorithm='ES256',
                 headers=header
             )
@@ -86,16 +148,29 @@ class AppleMusicService:
     
     def _get_developer_token(self) -> str:
         """Get valid developer token, generating if necessary"""
-        now = datetime.utcnow()
+        now = time.monotonic()
         
-        if self._developer_token and self._token_expiry and now < self._token_expiry:
+        if self._developer_token and now < self._token_expiry:
             return self._developer_token
         
         self._developer_token = self._generate_developer_token()
-        self._token_expiry = now + timedelta(hours=5, minutes=30)  # Refresh 30 mins before expiry
+        self._token_expiry = now + DEVELOPER_TOKEN_REFRESH_SECONDS
         
         return self._developer_token
     
+    def _request_headers(self, user_token: Optional[str] = None) -> Dict[str, str]:
+        """Get request headers, rebuilding the shared base only when the token changes"""
+        developer_token = self._get_developer_token()
+        if developer_token is not self._headers_token:
+            self._headers_token = developer_token
+            self._base_headers = {
+                "Authorization": "Bearer " + developer_token,
+                "Content-Type": "application/json"
+            }
+        if user_token:
+            return {**self._base_headers, "Music-User-Token": user_token}
+        return self._base_headers
+    
     async def _make_request(
         self, 
         method: str, 
@@ -107,68 +182,37 @@ class AppleMusicService:
         """Make a rate-limited request to Apple Music API with comprehensive error handling"""
         await self.rate_limiter.acquire()
         
-        headers = {
-            "Authorization": f"Bearer {self._get_developer_token()}",
-            "Content-Type": "application/json"
-        }
-        
-        if user_token:
-            headers["Music-User-Token"] = user_token
+        headers = self._request_headers(user_token)
         
         try:
-            ssl_context = aiohttp.TCPConnector(ssl_context=TLS_CONFIG)
-            async with aiohttp.ClientSession(connector=ssl_context) as session:
-                async with session.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    params=params,
-                    json=data
-                ) as response:
-                    # Handle rate limiting
-                    if response.status == 429:
-                        retry_after = int(response.headers.get('Retry-After', 60))
-                        logger.warning(f"Rate limited by Apple Music API, waiting {retry_after} seconds")
-                        raise RateLimitException(f"Rate limited, retry after {retry_after} seconds", retry_after)
-                    
-                    # Handle authentication errors
-                    if response.status == 401:
-                        error_text = await response.text()
-                        logger.error(f"Apple Music authentication error: {error_text}")
-                        # Try to regenerate token once
-                        self._developer_token = None
-                        headers["Authorization"] = f"Bearer {self._get_developer_token()}"
-                        # Retry once with new token
-                        async with session.request(
-                            method=method,
-                            url=url,
-                            headers=headers,
-                            params=params,
-                            json=data
-                        ) as retry_response:
-                            if retry_response.status == 401:
-                                raise AuthenticationException("Apple Music authentication failed after token refresh")
-                            response = retry_response
-                    
-                    # Handle other client errors
-                    if 400 <= response.status < 500:
-                        error_text = await response.text()
-                        logger.error(f"Apple Music client error {response.status}: {error_text}")
-                        raise APIException(f"Apple Music API client error: {response.status}", response.status)
-                    
-                    # Handle server errors with retry
-                    if response.status >= 500:
-                        error_text = await response.text()
-                        logger.error(f"Apple Music server error {response.status}: {error_text}")
-                        raise APIException(f"Apple Music API server error: {response.status}", response.status)
-                    
-                    if not response.ok:
-                        error_text = await response.text()
-                        logger.error(f"Apple Music API error {response.status}: {error_text}")
-                        raise APIException(f"Apple Music API error: {response.status}", response.status)
-                    
-                    return await response.json()
-                    
+            session = self._get_session()
+            async with session.request(
+                method=method,
+                url=url,
+                headers=headers,
+                params=params,
+                json=data
+            ) as response:
+                if response.status != 401:
+                    return await self._read_response(response)
+                error_text = await response.text()
+            
+            # Handle authentication errors - the first response is released
+            # before retrying once with a regenerated token
+            logger.error(f"Apple Music authentication error: {error_text}")
+            self._developer_token = None
+            headers = self._request_headers(user_token)
+            async with session.request(
+                method=method,
+                url=url,
+                headers=headers,
+                params=params,
+                json=data
+            ) as response:
+                if response.status == 401:
+                    raise AuthenticationException("Apple Music authentication failed after token refresh")
+                return await self._read_response(response)
+                
         except aiohttp.ClientError as e:
             logger.error(f"Apple Music API network error: {e}")
             raise APIException(f"Network error connecting to Apple Music API: {str(e)}")
@@ -176,6 +220,33 @@ class AppleMusicService:
             logger.error("Apple Music API request timeout")
             raise APIException("Apple Music API request timeout")
     
+    async def _read_response(self, response: aiohttp.ClientResponse) -> Dict[str, Any]:
+        """Raise for an error response, otherwise return its decoded JSON body"""
+        # Handle rate limiting
+        if response.status == 429:
+            retry_after = int(response.headers.get('Retry-After', 60))
+            logger.warning(f"Rate limited by Apple Music API, waiting {retry_after} seconds")
+            raise RateLimitException(f"Rate limited, retry after {retry_after} seconds", retry_after)
+        
+        # Handle other client errors
+        if 400 <= response.status < 500:
+            error_text = await response.text()
+            logger.error(f"Apple Music client error {response.status}: {error_text}")
+            raise APIException(f"Apple Music API client error: {response.status}", response.status)
+        
+        # Handle server errors with retry
+        if response.status >= 500:
+            error_text = await response.text()
+            logger.error(f"Apple Music server error {response.status}: {error_text}")
+            raise APIException(f"Apple Music API server error: {response.status}", response.status)
+        
+        if not response.ok:
+            error_text = await response.text()
+            logger.error(f"Apple Music API error {response.status}: {error_text}")
+            raise APIException(f"Apple Music API error: {response.status}", response.status)
+        
+        return await response.json(loads=orjson.loads)
+    
     async def search_track(
         self, 
         artist: str, 
@@ -184,8 +255,59 @@ class AppleMusicService:
         isrc: Optional[str] = None,
         user_token: Optional[str] = None,
         country: str = "us"
+    ) -> Dict[str, Any]:
+        """Search for a track on Apple Music, raising TrackNotFoundError when there is no match"""
+        track = await self.find_track(artist, title, album, isrc, user_token, country)
+        if track is None:
+            raise TrackNotFoundError(f"Track not found: {artist} - {title}")
+        return track
+    
+    async def find_track(
+        self, 
+        artist: str, 
+        title: str, 
+        album: Optional[str] = None,
+        isrc: Optional[str] = None,
+        user_token: Optional[str] = None,
+        country: str = "us"
+    ) -> Optional[Dict[str, Any]]:
+        """Find a track on Apple Music, or None if there is no match
+        
+        Identical searches share one lookup. Misses are a normal result rather
+        than an exception, so bulk callers do not pay for raising one per track.
+        """
+        key = (isrc or "", artist.lower(), title.lower(), (album or "").lower(), country)
+        cached = self._search_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        search = self._inflight_searches.get(key)
+        if search is None:
+            search = asyncio.ensure_future(
+                self._search_track(artist, title, album, isrc, user_token, country)
+            )
+            self._inflight_searches[key] = search
+            search.add_done_callback(partial(self._finish_search, key))
+        # Shielded so one caller being cancelled does not cancel the shared search
+        return await asyncio.shield(search)
+    
+    def _finish_search(self, key: Tuple[str, ...], search: asyncio.Task):
+        """Cache a completed search and stop sharing it"""
+        self._inflight_searches.pop(key, None)
+        if not search.cancelled() and search.exception() is None and search.result() is not None:
+            self._search_cache[key] = search.result()
+    
+    async def _search_track(
+        self, 
+        artist: str, 
+        title: str, 
+        album: Optional[str],
+        isrc: Optional[str],
+        user_token: Optional[str],
+        country: str
     ) -> Optional[Dict[str, Any]]:
         """Search for a track on Apple Music with fallback strategies"""
+        search_url = f"{self.base_url}/catalog/{country}/search"
         
         # Strategy 1: Search by ISRC if available
         if isrc:
@@ -196,12 +318,15 @@ class AppleMusicService:
                     "limit": 1
                 }
                 
-                response = await self._make_request("GET", f"{self.base_url}/catalog/{country}/search", user_token, params)
-                
-                if response.get("results", {}).get("songs", {}).get("data"):
-                    track = response["results"]["songs"]["data"][0]
-                    return self._format_track_response(track)
+                songs = self._extract_songs(
+                    await self._make_request("GET", search_url, user_token, params)
+                )
+                if songs:
+                    return self._format_track_response(songs[0])
                     
+            except RateLimitException:
+                # Let callers back off instead of treating the track as missing
+                raise
             except Exception as e:
                 logger.warning(f"ISRC search failed for {isrc}: {e}")
         
@@ -214,9 +339,9 @@ class AppleMusicService:
                 "limit": 10  # Get more results to find best match
             }
             
-            response = await self._make_request("GET", f"{self.base_url}/catalog/{country}/search", user_token, params)
-            
-            songs = response.get("results", {}).get("songs", {}).get("data", [])
+            songs = self._extract_songs(
+                await self._make_request("GET", search_url, user_token, params)
+            )
             
             if songs:
                 # Find best match based on similarity
@@ -224,6 +349,8 @@ class AppleMusicService:
                 if best_match:
                     return self._format_track_response(best_match)
         
+        except RateLimitException:
+            raise
         except Exception as e:
             logger.warning(f"Artist/title search failed for '{artist} - {title}': {e}")
         
@@ -239,21 +366,66 @@ class AppleMusicService:
                     "limit": 10
                 }
                 
-                response = await self._make_request("GET", f"{self.base_url}/catalog/{country}/search", user_token, params)
-                
-                songs = response.get("results", {}).get("songs", {}).get("data", [])
+                songs = self._extract_songs(
+                    await self._make_request("GET", search_url, user_token, params)
+                )
                 
                 if songs:
                     best_match = self._find_best_match(songs, artist, title, album)
                     if best_match:
                         return self._format_track_response(best_match)
                         
+            except RateLimitException:
+                raise
             except Exception as e:
                 logger.warning(f"Simplified search failed for '{simplified_term}': {e}")
         
         # No match found
         logger.info(f"No match found on Apple Music for '{artist} - {title}'")
-        raise TrackNotFoundError(f"Track not found: {artist} - {title}")
+        return None
+    
+    async def search_tracks_bulk(
+        self,
+        queries: List[Tuple[str, str, Optional[str], Optional[str]]],
+        user_token: Optional[str] = None,
+        country: str = "us",
+        concurrency: Optional[int] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Search for many tracks concurrently
+        
+        Each query is an (artist, title, album, isrc) tuple. Results come back in
+        query order, with None for tracks that could not be found.
+        """
+        if concurrency is None:
+            # The rate limiter paces requests; this only bounds how many wait on it
+            concurrency = min(20, max(1, self.rate_limiter.max_requests // 10))
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def guarded_search(artist: str, title: str, album: Optional[str], isrc: Optional[str]):
+            async with semaphore:
+                return await self.find_track(artist, title, album, isrc, user_token, country)
+        
+        results = await asyncio.gather(
+            *(guarded_search(*query) for query in queries),
+            return_exceptions=True
+        )
+        
+        tracks = []
+        for (artist, title, _, _), result in zip(queries, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Track search failed for '{artist} - {title}': {result}")
+                result = None
+            tracks.append(result)
+        return tracks
+    
+    @staticmethod
+    def _extract_songs(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Return the song results of a catalog search response"""
+        try:
+            return response["results"]["songs"]["data"]
+        except (KeyError, TypeError):
+            # Searches with no song hits omit the "songs" group entirely
+            return []
     
     def _find_best_match(
         self, 
@@ -263,31 +435,50 @@ class AppleMusicService:
         target_album: Optional[str] = None
     ) -> Optional[Dict]:
         """Find the best matching song from search results"""
-        from difflib import SequenceMatcher
+        target_artist = target_artist.lower()
+        target_title = target_title.lower()
+        target_album = target_album.lower() if target_album else ""
         
         best_match = None
-        best_score = 0.0
+        # Minimum threshold for consideration
+        best_score = 0.7
+        
+        title_length = len(target_title)
         
         for song in songs:
             attrs = song.get("attributes", {})
-            song_artist = attrs.get("artistName", "").lower()
             song_title = attrs.get("name", "").lower()
+            song_artist = attrs.get("artistName", "").lower()
             song_album = attrs.get("albumName", "").lower()
             
-            # Calculate similarity scores
-            artist_score = SequenceMatcher(None, target_artist.lower(), song_artist).ratio()
-            title_score = SequenceMatcher(None, target_title.lower(), song_title).ratio()
+            # An exact hit already has the highest score any candidate can reach
+            if song_title == target_title and song_artist == target_artist and (
+                not target_album or song_album == target_album
+            ):
+                return song
+            
+            album_bonus = 0.2 if target_album and song_album else 0.0
+            
+            # Similarity is at most 2 * shorter / combined length, so titles of
+            # very different lengths are ruled out before scoring them
+            length_total = title_length + len(song_title)
+            if length_total and 2 * min(title_length, len(song_title)) / length_total * 0.6 + 0.4 + album_bonus <= best_score:
+                continue
             
             # Weight: title is most important, then artist
+            title_score = _similarity(target_title, song_title)
+            if title_score * 0.6 + 0.4 + album_bonus <= best_score:
+                # Cannot beat the current best even with perfect artist/album scores
+                continue
+            
+            artist_score = _similarity(target_artist, song_artist)
             total_score = (title_score * 0.6) + (artist_score * 0.4)
             
             # Bonus for album match
-            if target_album and song_album:
-                album_score = SequenceMatcher(None, target_album.lower(), song_album).ratio()
-                total_score += album_score * 0.2
+            if album_bonus:
+                total_score += _similarity(target_album, song_album) * album_bonus
             
-            # Minimum threshold for consideration
-            if total_score > 0.7 and total_score > best_score:
+            if total_score > best_score:
                 best_score = total_score
                 best_match = song
         
@@ -350,9 +541,14 @@ class AppleMusicService:
         self, 
         playlist_id: str, 
         track_ids: List[str],
-        user_token: Optional[str] = None
+        user_token: Optional[str] = None,
+        concurrency: int = 1
     ) -> bool:
-        """Add tracks to an Apple Music playlist"""
+        """Add tracks to an Apple Music playlist
+        
+        Batches are appended in the order their requests complete, so raise
+        concurrency only when the order of tracks in the playlist does not matter.
+        """
         if not user_token:
             raise AuthenticationException("User token required to modify playlists")
         
@@ -361,31 +557,44 @@ class AppleMusicService:
         
         # Apple Music API has limits on batch operations
         batch_size = 25
+        url = f"{self.base_url}/me/library/playlists/{playlist_id}/tracks"
+        payloads = [
+            {"data": [{"id": track_id, "type": "songs"} for track_id in track_ids[i:i + batch_size]]}
+            for i in range(0, len(track_ids), batch_size)
+        ]
         
-        for i in range(0, len(track_ids), batch_size):
-            batch = track_ids[i:i + batch_size]
-            
-            track_data = {
-                "data": [
-                    {
-                        "id": track_id,
-                        "type": "songs"
-                    } for track_id in batch
-                ]
-            }
-            
+        async def post_batch(track_data: Dict[str, Any]):
             try:
-                await self._make_request(
-                    "POST",
-                    f"{self.base_url}/me/library/playlists/{playlist_id}/tracks",
-                    user_token,
-                    data=track_data
-                )
-                
-                logger.info(f"Added {len(batch)} tracks to playlist {playlist_id}")
-                
+                await self._make_request("POST", url, user_token, data=track_data)
             except Exception as e:
                 logger.error(f"Failed to add tracks to playlist {playlist_id}: {e}")
                 raise
+            logger.info(f"Added {len(track_data['data'])} tracks to playlist {playlist_id}")
+        
+        if concurrency <= 1:
+            # Sequential posts keep batch order and stop at the first failure
+            for track_data in payloads:
+                await post_batch(track_data)
+            return True
         
-        return True
\ No newline at end of file
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def guarded_post(track_data: Dict[str, Any]):
+            async with semaphore:
+                await post_batch(track_data)
+        
+        tasks = [asyncio.ensure_future(guarded_post(track_data)) for track_data in payloads]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop posting the remaining batches once one has failed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return True
+
+@lru_cache(maxsize=1)
+def get_apple_music_service() -> AppleMusicService:
+    """Return the shared AppleMusicService, creating it on first use"""
+    return AppleMusicService()
@@ -3,67 +3,142 @@ Authentication service for OAuth flows with Spotify and Apple Music
 Handles user sessions, token management, and profile data
 """
 
-import uuid
+import hashlib
+import hmac
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+import secrets
+import time
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime
+from urllib.parse import urlencode
 import aiohttp
 import base64
+import orjson
+from cachetools import TLRUCache, TTLCache
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 from ..core.config import settings
+from ..core.http_client import create_client_session
+from ..core.redis_client import get_shared_store
 from ..core.security import security_manager
-from .spotify_service import SpotifyService
-from .apple_music_service import AppleMusicService
+from .spotify_service import SpotifyService, get_spotify_service
+from .apple_music_service import AppleMusicService, get_apple_music_service
 
 logger = logging.getLogger(__name__)
 
+# OAuth states are single use and valid for 10 minutes
+OAUTH_STATE_TTL_SECONDS = 10 * 60
+MAX_OAUTH_STATES = 10_000
+MAX_USER_SESSIONS = 10_000
+
+# Nonces of consumed OAuth states, shared by every worker when Redis is enabled
+OAUTH_NONCE_KEY_PREFIX = "oauth:nonce:"
+
+@lru_cache(maxsize=8)
+def _state_signing_key(secret_key: str) -> bytes:
+    """Derive the OAuth state HMAC key, so SECRET_KEY itself only signs JWTs"""
+    return hmac.new(secret_key.encode(), b"oauth-state", hashlib.sha256).digest()
+
+def _state_signature(payload: bytes) -> str:
+    """HMAC-SHA256 signature of an encoded OAuth state payload"""
+    return hmac.new(_state_signing_key(settings.SECRET_KEY), payload, hashlib.sha256).hexdigest()[:32]
+
+def _encode_oauth_state(provider: str, redirect_uri: str) -> str:
+    """Encode the OAuth flow details into a signed, self-contained state value"""
+    payload = base64.urlsafe_b64encode(orjson.dumps({
+        "p": provider,
+        "r": redirect_uri,
+        "e": int(time.time()) + OAUTH_STATE_TTL_SECONDS,
+        "n": secrets.token_urlsafe(8)
+    })).rstrip(b"=")
+    return f"{payload.decode()}.{_state_signature(payload)}"
+
+def _decode_oauth_state(state: str) -> Optional[Dict[str, Any]]:
+    """Return the details of a validly signed, unexpired OAuth state, or None"""
+    payload, _, signature = state.partition(".")
+    # Compared as bytes so arbitrary query input cannot make compare_digest raise
+    if not hmac.compare_digest(signature.encode(), _state_signature(payload.encode()).encode()):
+        return None
+    try:
+        oauth_state = orjson.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (ValueError, orjson.JSONDecodeError):
+        return None
+    if oauth_state["e"] <= time.time():
+        return None
+    return oauth_state
+
+def _session_expiry(user_id: str, session: Dict[str, Any], now: float) -> float:
+    """Expire a cached user session together with its provider access token"""
+    # Called with the cache's time.monotonic() clock when the session is stored
+    return now + session["expires_in"]
+
+SPOTIFY_SCOPES = (
+    'user-read-private',
+    'user-read-email',
+    'playlist-read-private',
+    'playlist-read-collaborative'
+)
+
+@lru_cache(maxsize=32)
+def _auth_url_parts(provider: str, redirect_uri: str) -> Tuple[str, str]:
+    """Build the OAuth authorization URL around its per-request state value
+    
+    Everything except the state is fixed for a provider and redirect URI, so
+    the URL is assembled once and returned as the parts before and after state.
+    """
+    if provider == 'spotify':
+        # urlencode escapes the redirect URI, which is itself a URL
+        query = urlencode({
+            "client_id": settings.SPOTIFY_CLIENT_ID,
+            "response_type": "code",
+            "redirect_uri": redirect_uri,
+            "scope": " ".join(SPOTIFY_SCOPES)
+        })
+        return f"https://accounts.spotify.com/authorize?{query}&state=", "&show_dialog=true"
+    
+    if provider == 'apple-music':
+        # Apple Music uses MusicKit JS for web authentication
+        # For now, return a placeholder URL
+        return "https://beta.music.apple.com/authorize?state=", ""
+    
+    raise ValueError(f"Unsupported OAuth provider: {provider}")
+
 class AuthService:
     """Service for handling OAuth authentication flows"""
     
-    def __init__(self):
-        self.spotify_service = SpotifyService()
-        self.apple_music_service = AppleMusicService()
+    def __init__(self, state_store: Optional[Redis] = None):
+        self.spotify_service = get_spotify_service()
+        self.apple_music_service = get_apple_music_service()
         # In production, use Redis or database for session storage
-        self.user_sessions: Dict[str, Dict[str, Any]] = {}
-        self.oauth_states: Dict[str, Dict[str, Any]] = {}
+        # Entries expire on their own, so lookups never need to sweep stale data
+        self.user_sessions: TLRUCache = TLRUCache(maxsize=MAX_USER_SESSIONS, ttu=_session_expiry)
+        # Nonces of states already presented, kept until those states have expired;
+        # the shared store, when configured, replaces the per-process cache
+        self.state_store = state_store
+        self.used_state_nonces: TTLCache = TTLCache(maxsize=MAX_OAUTH_STATES, ttl=OAUTH_STATE_TTL_SECONDS)
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = create_client_session()
+        return self._session
+    
+    async def close(self):
+        """Close the pooled HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     def generate_oauth_url(self, provider: str, redirect_uri: str) -> Dict[str, str]:
         """Generate OAuth authorization URL for the given provider"""
-        state = str(uuid.uuid4())
-        
-        if provider == 'spotify':
-            scopes = [
-                'user-read-private',
-                'user-read-email',
-                'playlist-read-private',
-                'playlist-read-collaborative'
-            ]
-            
-            auth_url = (
-                f"https://accounts.spotify.com/authorize?"
-                f"client_id={settings.SPOTIFY_CLIENT_ID}&"
-                f"response_type=code&"
-                f"redirect_uri={redirect_uri}&"
-                f"scope={'+'.join(scopes)}&"
-                f"state={state}&"
-                f"show_dialog=true"
-            )
-        
-        elif provider == 'apple-music':
-            # Apple Music uses MusicKit JS for web authentication
-            # For now, return a placeholder URL
-            auth_url = f"https://beta.music.apple.com/authorize?state={state}"
-        
-        else:
-            raise ValueError(f"Unsupported OAuth provider: {provider}")
-        
-        # Store state for validation
-        self.oauth_states[state] = {
-            "provider": provider,
-            "redirect_uri": redirect_uri,
-            "created_at": datetime.utcnow(),
-            "expires_at": datetime.utcnow() + timedelta(minutes=10)
-        }
+        prefix, suffix = _auth_url_parts(provider, redirect_uri)
+        # The state carries its own signed provider, redirect URI and expiry;
+        # only its nonce is recorded once the callback has consumed it
+        state = _encode_oauth_state(provider, redirect_uri)
+        auth_url = prefix + state + suffix
         
         return {
             "auth_url": auth_url,
@@ -72,27 +147,48 @@ class AuthService:
     
     async def handle_oauth_callback(self, provider: str, code: str, state: str) -> Dict[str, Any]:
         """Handle OAuth callback and exchange code for tokens"""
-        # Validate state
-        if state not in self.oauth_states:
-            raise ValueError("Invalid OAuth state")
-        
-        oauth_state = self.oauth_states[state]
-        if oauth_state["expires_at"] < datetime.utcnow():
-            raise ValueError("OAuth state expired")
+        # Validate and consume state - a state can only be presented once
+        oauth_state = _decode_oauth_state(state)
+        if oauth_state is None or not await self._consume_state_nonce(oauth_state["n"], oauth_state["e"]):
+            raise ValueError("Invalid or expired OAuth state")
         
-        if oauth_state["provider"] != provider:
+        if oauth_state["p"] != provider:
             raise ValueError("Provider mismatch")
         
-        # Clean up state
-        del self.oauth_states[state]
-        
         if provider == 'spotify':
-            return await self._handle_spotify_callback(code, oauth_state["redirect_uri"])
+            return await self._handle_spotify_callback(code, oauth_state["r"])
         elif provider == 'apple-music':
-            return await self._handle_apple_music_callback(code, oauth_state["redirect_uri"])
+            return await self._handle_apple_music_callback(code, oauth_state["r"])
         else:
             raise ValueError(f"Unsupported provider: {provider}")
     
+    async def _consume_state_nonce(self, nonce: str, expires_at: int) -> bool:
+        """Mark an OAuth state's nonce as used, returning False if it cannot be
+        
+        Fails closed: a nonce that cannot be recorded is treated as already used.
+        """
+        if self.state_store is not None:
+            try:
+                return bool(await self.state_store.set(
+                    OAUTH_NONCE_KEY_PREFIX + nonce, 1,
+                    nx=True,
+                    ex=max(1, expires_at - int(time.time()))
+                ))
+            except RedisError as e:
+                logger.error("Failed to record OAuth state nonce in Redis: %s", e)
+                return False
+        
+        if nonce in self.used_state_nonces:
+            return False
+        if len(self.used_state_nonces) >= self.used_state_nonces.maxsize:
+            # Evicting a live nonce would let its state be replayed
+            self.used_state_nonces.expire()
+            if len(self.used_state_nonces) >= self.used_state_nonces.maxsize:
+                logger.warning("Too many OAuth states in flight, rejecting callback")
+                return False
+        self.used_state_nonces[nonce] = True
+        return True
+    
     async def _handle_spotify_callback(self, code: str, redirect_uri: str) -> Dict[str, Any]:
         """Handle Spotify OAuth callback"""
         try:
@@ -114,14 +210,13 @@ class AuthService:
                 "redirect_uri": redirect_uri
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(token_url, headers=headers, data=data) as response:
-                    if not response.ok:
-                        error_text = await response.text()
-                        logger.error(f"Spotify token exchange failed: {error_text}")
-                        raise Exception("Failed to exchange code for token")
-                    
-                    token_data = await response.json()
+            async with self._get_session().post(token_url, headers=headers, data=data) as response:
+                if not response.ok:
+                    error_text = await response.text()
+                    logger.error(f"Spotify token exchange failed: {error_text}")
+                    raise Exception("Failed to exchange code for token")
+                
+                token_data = await response.json(loads=orjson.loads)
             
             # Get user profile
             access_token = token_data["access_token"]
@@ -137,7 +232,7 @@ class AuthService:
                 "apple_music_token": None,
                 "profile": user_profile,
                 "created_at": datetime.utcnow(),
-                "expires_at": datetime.utcnow() + timedelta(seconds=token_data.get("expires_in", 3600))
+                "expires_in": token_data.get("expires_in", 3600)
             }
             
             self.user_sessions[user_id] = session_data
@@ -177,21 +272,14 @@ class AuthService:
         """Get Spotify user profile"""
         headers = {"Authorization": f"Bearer {access_token}"}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get("https://api.spotify.com/v1/me", headers=headers) as response:
-                if not response.ok:
-                    raise Exception("Failed to get user profile")
-                return await response.json()
+        async with self._get_session().get("https://api.spotify.com/v1/me", headers=headers) as response:
+            if not response.ok:
+                raise Exception("Failed to get user profile")
+            return await response.json(loads=orjson.loads)
     
     def get_user_session(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user session data"""
-        session = self.user_sessions.get(user_id)
-        if session and session["expires_at"] > datetime.utcnow():
-            return session
-        elif session:
-            # Session expired, clean up
-            del self.user_sessions[user_id]
-        return None
+        return self.user_sessions.get(user_id)
     
     def get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user profile from session"""
@@ -240,4 +328,9 @@ class AuthService:
         else:
             raise ValueError(f"Unsupported provider: {provider}")
         
-        return self.get_user_profile(user_id)
\ No newline at end of file
+        return self.get_user_profile(user_id)
+
+@lru_cache(maxsize=1)
+def get_auth_service() -> AuthService:
+    """Return the shared AuthService, creating it on first use"""
+    return AuthService(get_shared_store())
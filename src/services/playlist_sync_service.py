@@ -4,31 +4,142 @@ Coordinates syncing playlists between Spotify and Apple Music
 """
 
 import asyncio
+import hashlib
+import heapq
 import logging
+from functools import lru_cache, partial
+import time
 import uuid
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
-import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any, Set, Tuple
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from itertools import chain
+from operator import attrgetter
+from types import MappingProxyType
+
+import orjson
+from cachetools import TTLCache
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 from ..models.playlist import (
     SyncStatus, SyncStatusResponse, SyncHistoryItem, TrackSyncResult,
     PlaylistResponse, TrackResponse
 )
-from .spotify_service import SpotifyService
-from .apple_music_service import AppleMusicService
+from ..core.redis_client import get_shared_store
+from .spotify_service import SpotifyService, get_spotify_service
+from .apple_music_service import AppleMusicService, get_apple_music_service
+from .exceptions import RateLimitException
 
 logger = logging.getLogger(__name__)
 
+# Number of history items returned to clients
+SYNC_HISTORY_LIMIT = 50
+
+# Tracks looked up on Apple Music at the same time during a sync
+SYNC_TRACK_CONCURRENCY = 8
+
+# A user's playlist list is fetched at most once a minute across sync starts
+PLAYLIST_INDEX_TTL_SECONDS = 60
+PLAYLIST_INDEX_CACHE_SIZE = 1024
+
+# Matched tracks added to the Apple Music playlist per add call
+SYNC_ADD_BATCH_SIZE = 100
+
+# Times a rate-limited Apple Music call is retried after waiting out Retry-After
+SYNC_RATE_LIMIT_RETRIES = 3
+
+# Minimum time between status timestamp refreshes while tracks are syncing
+STATUS_PUBLISH_INTERVAL_SECONDS = 0.5
+
+# Sync status mirrored to Redis is readable by every worker for a day
+SYNC_STATUS_KEY_PREFIX = "sync:status:"
+SYNC_STATUS_TTL_SECONDS = 24 * 60 * 60
+
+# Per-user sync history kept in Redis as a sorted set scored by created_at
+SYNC_HISTORY_KEY_PREFIX = "sync:history:"
+SYNC_HISTORY_MAX_ITEMS = 100
+
+# Search outcome of one track: Spotify track, Apple Music match or None, error or None
+TrackOutcome = Tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[str]]
+
+@dataclass(slots=True)
+class TrackSyncRecord:
+    """Result of syncing a single track, encoded with the TrackSyncResult shape"""
+    spotify_track: Dict[str, Any]
+    apple_music_track: Optional[Dict[str, Any]]
+    status: str  # "success", "not_found", "error"
+    error_message: Optional[str] = None
+
+@dataclass(slots=True)
+class SyncTaskState:
+    """In-memory state of a single sync task"""
+    task_id: str
+    spotify_playlist_id: str
+    # Provider tokens never leave the process
+    apple_music_token: str = field(repr=False)
+    spotify_token: str = field(repr=False)
+    create_new: bool = True
+    apple_music_playlist_name: Optional[str] = None
+    status: SyncStatus = SyncStatus.PENDING
+    progress: int = 0
+    total_tracks: int = 0
+    synced_tracks: int = 0
+    failed_tracks: int = 0
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
+    error_message: Optional[str] = None
+    spotify_playlist: Optional[Dict[str, Any]] = None
+    apple_music_playlist: Optional[Dict[str, Any]] = None
+    track_results: List[TrackSyncRecord] = field(default_factory=list)
+    # track_results pre-encoded as JSON, one comma-terminated item per track
+    track_results_json: bytearray = field(default_factory=bytearray, repr=False)
+
+# Fields sent to clients ahead of the track results, in status JSON order
+_STATUS_HEADER_FIELDS = (
+    "task_id", "status", "spotify_playlist_id", "create_new", "apple_music_playlist_name",
+    "progress", "total_tracks", "synced_tracks", "failed_tracks", "created_at", "updated_at",
+    "completed_at", "error_message", "spotify_playlist", "apple_music_playlist"
+)
+
+# Fixed fields of a newly created Apple Music playlist; the nested containers are
+# shared between playlists and must not be mutated
+_NEW_APPLE_PLAYLIST_FIELDS = MappingProxyType({
+    "track_count": 0,
+    "owner": "User",
+    "public": False,
+    "collaborative": False,
+    "external_urls": {},
+    "images": []
+})
+
 class PlaylistSyncService:
     """Service for managing playlist synchronization between Spotify and Apple Music"""
     
-    def __init__(self, spotify_service: SpotifyService, apple_music_service: AppleMusicService):
+    def __init__(
+        self,
+        spotify_service: SpotifyService,
+        apple_music_service: AppleMusicService,
+        status_store: Optional[Redis] = None
+    ):
         self.spotify_service = spotify_service
         self.apple_music_service = apple_music_service
+        # Optional shared store so status polls and history can be served by any worker
+        self.status_store = status_store
         
-        # In-memory storage for sync tasks (in production, use Redis or database)
-        self.sync_tasks: Dict[str, Dict[str, Any]] = {}
+        # In-memory storage for sync tasks; the shared store, when configured, mirrors them
+        self.sync_tasks: Dict[str, SyncTaskState] = {}
         self.sync_history: Dict[str, List[SyncHistoryItem]] = {}
+        
+        # User playlist indexes reused by syncs started within a short window
+        self._playlist_index_cache: TTLCache = TTLCache(
+            maxsize=PLAYLIST_INDEX_CACHE_SIZE, ttl=PLAYLIST_INDEX_TTL_SECONDS
+        )
+        self._inflight_playlist_indexes: Dict[bytes, asyncio.Task] = {}
+        
+        # Strong references to running sync tasks - the event loop only keeps weak ones
+        self._background_tasks: Set[asyncio.Task] = set()
     
     async def start_sync(
         self,
@@ -39,145 +150,264 @@ class PlaylistSyncService:
         apple_music_playlist_name: Optional[str] = None
     ) -> str:
         """Start a background playlist sync operation"""
-        task_id = str(uuid.uuid4())
+        task_id = uuid.uuid4().hex
         
         # Initialize task record
-        self.sync_tasks[task_id] = {
-            "task_id": task_id,
-            "status": SyncStatus.PENDING,
-            "spotify_playlist_id": spotify_playlist_id,
-            "apple_music_token": apple_music_token,
-            "spotify_token": spotify_token,
-            "create_new": create_new,
-            "apple_music_playlist_name": apple_music_playlist_name,
-            "progress": 0,
-            "total_tracks": 0,
-            "synced_tracks": 0,
-            "failed_tracks": 0,
-            "track_results": [],
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
-            "completed_at": None,
-            "error_message": None,
-            "spotify_playlist": None,
-            "apple_music_playlist": None
-        }
+        now = datetime.utcnow()
+        self.sync_tasks[task_id] = SyncTaskState(
+            task_id=task_id,
+            spotify_playlist_id=spotify_playlist_id,
+            apple_music_token=apple_music_token,
+            spotify_token=spotify_token,
+            create_new=create_new,
+            apple_music_playlist_name=apple_music_playlist_name,
+            created_at=now,
+            updated_at=now
+        )
         
-        # Start background sync
-        asyncio.create_task(self._perform_sync(task_id))
+        await self._publish_status(task_id)
         
-        logger.info(f"Started sync task {task_id} for playlist {spotify_playlist_id}")
+        # Start background sync without holding up the request
+        task = asyncio.create_task(self._perform_sync(task_id))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        
+        logger.info("Started sync task %s for playlist %s", task_id, spotify_playlist_id)
         return task_id
     
     async def _perform_sync(self, task_id: str):
         """Perform the actual playlist synchronization"""
         try:
             task_data = self.sync_tasks[task_id]
-            task_data["status"] = SyncStatus.IN_PROGRESS
-            task_data["updated_at"] = datetime.utcnow()
+            task_data.status = SyncStatus.IN_PROGRESS
+            task_data.updated_at = datetime.utcnow()
+            await self._publish_status(task_id)
             
-            # Get Spotify playlist details
             spotify_playlist = await self._get_spotify_playlist_details(
-                task_data["spotify_playlist_id"],
-                task_data["spotify_token"]
-            )
-            task_data["spotify_playlist"] = spotify_playlist
-            
-            # Get tracks from Spotify playlist
-            spotify_tracks = await self.spotify_service.get_playlist_tracks(
-                task_data["spotify_playlist_id"],
-                task_data["spotify_token"]
+                task_data.spotify_playlist_id,
+                task_data.spotify_token
             )
+            task_data.spotify_playlist = spotify_playlist
             
-            task_data["total_tracks"] = len(spotify_tracks)
-            logger.info(f"Task {task_id}: Found {len(spotify_tracks)} tracks to sync")
+            # Tracks are streamed page by page, so the playlist's reported size is
+            # the expected total until the stream has been fully read
+            task_data.total_tracks = spotify_playlist.get("track_count", 0)
+            logger.info("Task %s: Expecting %d tracks to sync", task_id, task_data.total_tracks)
             
             # Create or find Apple Music playlist
             apple_playlist_name = (
-                task_data["apple_music_playlist_name"] or 
+                task_data.apple_music_playlist_name or 
                 f"{spotify_playlist['name']} (from Spotify)"
             )
             
             apple_music_playlist = await self._create_apple_music_playlist(
                 apple_playlist_name,
                 spotify_playlist.get("description", ""),
-                task_data["apple_music_token"]
+                task_data.apple_music_token
             )
-            task_data["apple_music_playlist"] = apple_music_playlist
+            task_data.apple_music_playlist = apple_music_playlist
             
-            # Sync tracks one by one
-            track_results = []
+            # Search for tracks concurrently; the Apple Music rate limiter paces the API calls.
+            # Matched tracks are added to the playlist in batches of SYNC_ADD_BATCH_SIZE
+            resolved_tracks: Dict[str, Dict[str, Any]] = {}
+            # Searches finish out of order, so outcomes wait in the reorder buffer,
+            # keyed by playlist position, until every earlier track has arrived.
+            # They then move to pending in playlist order and are added and
+            # reported a batch at a time
+            reorder_buffer: Dict[int, TrackOutcome] = {}
+            pending: List[TrackOutcome] = []
+            pending_matches = 0
+            next_index = 0
+            draining = False
+            searched_count = 0
             synced_count = 0
             failed_count = 0
+            last_published = time.monotonic()
+            resume_at = 0.0
+            
+            async def with_backoff(call: Callable[[], Awaitable[Any]]) -> Any:
+                # A 429 from Apple Music pauses every worker until its Retry-After has passed
+                nonlocal resume_at
+                for attempt in range(SYNC_RATE_LIMIT_RETRIES + 1):
+                    delay = resume_at - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    try:
+                        return await call()
+                    except RateLimitException as e:
+                        if attempt == SYNC_RATE_LIMIT_RETRIES:
+                            raise
+                        logger.warning("Task %s: Rate limited by Apple Music, retrying in %s seconds", task_id, e.retry_after)
+                        resume_at = max(resume_at, time.monotonic() + e.retry_after)
+            
+            def record_result(
+                spotify_track: Dict[str, Any],
+                apple_music_track: Optional[Dict[str, Any]],
+                status: str,
+                error_message: Optional[str] = None
+            ):
+                nonlocal synced_count, failed_count
+                self._record_track_result(
+                    task_id, TrackSyncRecord(spotify_track, apple_music_track, status, error_message)
+                )
+                if status == "success":
+                    synced_count += 1
+                else:
+                    failed_count += 1
+                task_data.synced_tracks = synced_count
+                task_data.failed_tracks = failed_count
+            
+            async def commit_adds(batch: List[TrackOutcome]):
+                apple_track_ids = [
+                    apple_music_track["id"] for _, apple_music_track, _ in batch
+                    if apple_music_track is not None
+                ]
+                add_error: Optional[str] = None
+                if apple_track_ids:
+                    try:
+                        await with_backoff(lambda: self._add_tracks_to_apple_playlist(
+                            apple_music_playlist["id"],
+                            apple_track_ids,
+                            task_data.apple_music_token
+                        ))
+                    except Exception as e:
+                        logger.error("Task %s: Error adding %d tracks to playlist: %s", task_id, len(apple_track_ids), e)
+                        add_error = str(e)
+                for spotify_track, apple_music_track, error_message in batch:
+                    if error_message is not None:
+                        record_result(spotify_track, None, "error", error_message)
+                    elif apple_music_track is None:
+                        record_result(spotify_track, None, "not_found", "Track not found on Apple Music")
+                    elif add_error is not None:
+                        record_result(spotify_track, apple_music_track, "error", add_error)
+                    else:
+                        record_result(spotify_track, apple_music_track, "success")
             
-            for i, spotify_track in enumerate(spotify_tracks):
+            async def drain_in_order():
+                # Only one worker drains at a time; it keeps going while the next
+                # position is ready, including outcomes buffered during its awaits
+                nonlocal next_index, draining, pending_matches
+                if draining:
+                    return
+                draining = True
                 try:
-                    # Update progress
-                    task_data["progress"] = int((i / len(spotify_tracks)) * 100)
-                    task_data["updated_at"] = datetime.utcnow()
-                    
-                    # Try to find and add track to Apple Music playlist
-                    sync_result = await self._sync_single_track(
+                    while next_index in reorder_buffer:
+                        outcome = reorder_buffer.pop(next_index)
+                        next_index += 1
+                        pending.append(outcome)
+                        if outcome[1] is not None:
+                            pending_matches += 1
+                        if pending_matches >= SYNC_ADD_BATCH_SIZE:
+                            batch = pending[:]
+                            pending.clear()
+                            pending_matches = 0
+                            await commit_adds(batch)
+                finally:
+                    draining = False
+            
+            async def sync_track(index: int, spotify_track: Dict[str, Any]):
+                nonlocal searched_count, last_published
+                try:
+                    # Try to find track on Apple Music; a miss comes back as None
+                    apple_music_track = await with_backoff(lambda: self._resolve_apple_track(
                         spotify_track,
-                        apple_music_playlist["id"],
-                        task_data["apple_music_token"]
-                    )
-                    
-                    track_results.append(sync_result)
-                    
-                    if sync_result["status"] == "success":
-                        synced_count += 1
-                    else:
-                        failed_count += 1
-                    
-                    # Small delay to respect rate limits
-                    await asyncio.sleep(0.1)
-                    
+                        task_data.apple_music_token,
+                        resolved_tracks
+                    ))
                 except Exception as e:
-                    logger.error(f"Task {task_id}: Error syncing track {spotify_track.get('name', 'unknown')}: {e}")
-                    failed_count += 1
-                    track_results.append({
-                        "spotify_track": spotify_track,
-                        "apple_music_track": None,
-                        "status": "error",
-                        "error_message": str(e)
-                    })
+                    logger.error("Task %s: Error syncing track %s: %s", task_id, spotify_track.get("name", "unknown"), e)
+                    reorder_buffer[index] = (spotify_track, None, str(e))
+                else:
+                    reorder_buffer[index] = (spotify_track, apple_music_track, None)
+                await drain_in_order()
+                
+                # Update progress
+                searched_count += 1
+                if searched_count > task_data.total_tracks:
+                    task_data.total_tracks = searched_count
+                # Integer percentage without a float division and int() per track
+                task_data.progress = searched_count * 100 // task_data.total_tracks
+                
+                # Local polls read the counters live; the timestamp and the shared
+                # copy are refreshed at most every STATUS_PUBLISH_INTERVAL_SECONDS
+                now = time.monotonic()
+                if now - last_published >= STATUS_PUBLISH_INTERVAL_SECONDS:
+                    last_published = now
+                    task_data.updated_at = datetime.utcnow()
+                    await self._publish_status(task_id)
+            
+            await self._sync_track_stream(
+                self.spotify_service.iter_playlist_tracks(
+                    task_data.spotify_playlist_id,
+                    task_data.spotify_token
+                ),
+                sync_track
+            )
+            if pending:
+                await commit_adds(pending)
             
             # Update final task status
-            task_data["synced_tracks"] = synced_count
-            task_data["failed_tracks"] = failed_count
-            task_data["track_results"] = track_results
-            task_data["progress"] = 100
-            task_data["completed_at"] = datetime.utcnow()
-            task_data["updated_at"] = datetime.utcnow()
+            task_data.total_tracks = synced_count + failed_count
+            task_data.progress = 100
+            task_data.completed_at = task_data.updated_at = datetime.utcnow()
             
-            if synced_count == len(spotify_tracks):
-                task_data["status"] = SyncStatus.COMPLETED
+            if synced_count == task_data.total_tracks:
+                task_data.status = SyncStatus.COMPLETED
             elif synced_count > 0:
-                task_data["status"] = SyncStatus.PARTIAL
+                task_data.status = SyncStatus.PARTIAL
             else:
-                task_data["status"] = SyncStatus.FAILED
-                task_data["error_message"] = "No tracks could be synced"
+                task_data.status = SyncStatus.FAILED
+                task_data.error_message = "No tracks could be synced"
             
-            logger.info(f"Task {task_id}: Completed sync - {synced_count}/{len(spotify_tracks)} tracks synced")
+            logger.info("Task %s: Completed sync - %d/%d tracks synced", task_id, synced_count, task_data.total_tracks)
+            await self._publish_status(task_id)
             
             # Add to sync history (simplified - in production, associate with user)
             await self._add_to_history(task_data)
             
         except Exception as e:
-            logger.error(f"Task {task_id}: Sync failed with error: {e}")
-            task_data["status"] = SyncStatus.FAILED
-            task_data["error_message"] = str(e)
-            task_data["completed_at"] = datetime.utcnow()
-            task_data["updated_at"] = datetime.utcnow()
+            logger.error("Task %s: Sync failed with error: %s", task_id, e)
+            task_data.status = SyncStatus.FAILED
+            task_data.error_message = str(e)
+            task_data.completed_at = task_data.updated_at = datetime.utcnow()
+            await self._publish_status(task_id)
+    
+    @staticmethod
+    async def _sync_track_stream(
+        spotify_tracks: AsyncIterator[Dict[str, Any]],
+        sync_track: Callable[[int, Dict[str, Any]], Awaitable[None]]
+    ):
+        """Run sync_track(index, track) over streamed tracks with a fixed pool of workers"""
+        # The bounded queue keeps only a few tracks ahead of the workers in memory
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SYNC_TRACK_CONCURRENCY * 2)
+        
+        async def worker():
+            while (item := await queue.get()) is not None:
+                await sync_track(*item)
+        
+        async def producer():
+            index = 0
+            async for spotify_track in spotify_tracks:
+                await queue.put((index, spotify_track))
+                index += 1
+            for _ in range(SYNC_TRACK_CONCURRENCY):
+                await queue.put(None)
+        
+        # One task group, so a failing producer or worker cancels the rest
+        # instead of leaving the producer blocked on a full queue
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(producer())
+                for _ in range(SYNC_TRACK_CONCURRENCY):
+                    tg.create_task(worker())
+        except ExceptionGroup as group:
+            raise group.exceptions[0]
     
     async def _get_spotify_playlist_details(self, playlist_id: str, token: str) -> Dict[str, Any]:
         """Get Spotify playlist metadata"""
-        # Get basic playlist info (this is a simplified version - expand based on actual API)
-        playlists = await self.spotify_service.get_user_playlists(token)
-        for playlist in playlists:
-            if playlist["id"] == playlist_id:
-                return playlist
+        playlist = (await self._get_user_playlist_index(token)).get(playlist_id)
+        if playlist is not None:
+            return playlist
         
         # If not found in user playlists, return basic structure
         return {
@@ -192,6 +422,33 @@ class PlaylistSyncService:
             "images": []
         }
     
+    async def _get_user_playlist_index(self, token: str) -> Dict[str, Dict[str, Any]]:
+        """Get the user's Spotify playlists by id, shared by syncs started close together"""
+        # Keyed by a digest so cached entries never hold the raw token
+        key = hashlib.sha256(token.encode()).digest()
+        cached = self._playlist_index_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        fetch = self._inflight_playlist_indexes.get(key)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch_user_playlist_index(token))
+            self._inflight_playlist_indexes[key] = fetch
+            fetch.add_done_callback(partial(self._finish_playlist_index, key))
+        # Shielded so one sync being cancelled does not cancel the shared fetch
+        return await asyncio.shield(fetch)
+    
+    async def _fetch_user_playlist_index(self, token: str) -> Dict[str, Dict[str, Any]]:
+        """Fetch the user's Spotify playlists and index them by id"""
+        playlists = await self.spotify_service.get_user_playlists(token)
+        return {playlist["id"]: playlist for playlist in playlists}
+    
+    def _finish_playlist_index(self, key: bytes, fetch: asyncio.Task):
+        """Cache a completed playlist index and stop sharing its fetch"""
+        self._inflight_playlist_indexes.pop(key, None)
+        if not fetch.cancelled() and fetch.exception() is None:
+            self._playlist_index_cache[key] = fetch.result()
+    
     async def _create_apple_music_playlist(
         self, 
         name: str, 
@@ -202,111 +459,201 @@ class PlaylistSyncService:
         try:
             # This would call the actual Apple Music API to create a playlist
             # For now, return a mock response
-            playlist_id = str(uuid.uuid4())
             return {
-                "id": playlist_id,
+                "id": uuid.uuid4().hex,
                 "name": name,
                 "description": description,
-                "track_count": 0,
-                "owner": "User",
-                "public": False,
-                "collaborative": False,
-                "external_urls": {},
-                "images": []
+                **_NEW_APPLE_PLAYLIST_FIELDS
             }
         except Exception as e:
-            logger.error(f"Failed to create Apple Music playlist: {e}")
+            logger.error("Failed to create Apple Music playlist: %s", e)
             raise
     
-    async def _sync_single_track(
+    async def _resolve_apple_track(
         self, 
         spotify_track: Dict[str, Any], 
-        apple_playlist_id: str, 
+        apple_token: str,
+        resolved_tracks: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Find the Apple Music track matching a Spotify track, or None if there is none
+        
+        resolved_tracks maps ISRCs already found during this sync to their Apple
+        Music track, so repeated tracks skip the search.
+        """
+        isrc = spotify_track.get("isrc")
+        if isrc and resolved_tracks is not None and isrc in resolved_tracks:
+            return resolved_tracks[isrc]
+        
+        # This would call apple_music_service.find_track, which searches by ISRC
+        # first, then artist/title, and reports misses as None
+        # For now, simulate success for demonstration
+        apple_music_track = {
+            "id": uuid.uuid4().hex,
+            "name": spotify_track["name"],
+            "artist": spotify_track["artist"],
+            "album": spotify_track["album"],
+            "duration_ms": spotify_track["duration_ms"],
+            "isrc": isrc,
+            "preview_url": None,
+            "external_urls": {}
+        }
+        if isrc and resolved_tracks is not None:
+            resolved_tracks[isrc] = apple_music_track
+        return apple_music_track
+    
+    async def _add_tracks_to_apple_playlist(
+        self,
+        apple_playlist_id: str,
+        apple_track_ids: List[str],
         apple_token: str
-    ) -> Dict[str, Any]:
-        """Sync a single track to Apple Music"""
-        try:
-            # Search for track on Apple Music using ISRC first, then artist/title
-            search_query = ""
-            
-            if spotify_track.get("isrc"):
-                search_query = f"isrc:{spotify_track['isrc']}"
-            else:
-                search_query = f"{spotify_track['artist']} {spotify_track['name']}"
-            
-            # This would call the actual Apple Music search API
-            # For now, simulate success for demonstration
-            apple_music_track = {
-                "id": str(uuid.uuid4()),
-                "name": spotify_track["name"],
-                "artist": spotify_track["artist"],
-                "album": spotify_track["album"],
-                "duration_ms": spotify_track["duration_ms"],
-                "isrc": spotify_track.get("isrc"),
-                "preview_url": None,
-                "external_urls": {}
-            }
-            
-            # Add track to Apple Music playlist (would call actual API)
-            # For now, simulate success
-            
-            return {
-                "spotify_track": spotify_track,
-                "apple_music_track": apple_music_track,
-                "status": "success",
-                "error_message": None
-            }
-            
-        except Exception as e:
-            return {
-                "spotify_track": spotify_track,
-                "apple_music_track": None,
-                "status": "error",
-                "error_message": str(e)
-            }
+    ):
+        """Add a batch of matched tracks to the Apple Music playlist"""
+        # This would call apple_music_service.add_tracks_to_playlist, which posts
+        # the batch in as few requests as the API allows
+        # For now, simulate success
     
     async def get_sync_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get the current status of a sync operation"""
-        return self.sync_tasks.get(task_id)
+        task_data = self.sync_tasks.get(task_id)
+        if task_data is not None:
+            return self._public_status(task_data)
+        
+        raw_status = await self._load_shared_status(task_id)
+        return orjson.loads(raw_status) if raw_status is not None else None
     
-    async def get_sync_history(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get sync history for a user"""
+    async def get_sync_status_json(self, task_id: str) -> Optional[bytes]:
+        """Get the current status of a sync operation as encoded JSON"""
+        task_data = self.sync_tasks.get(task_id)
+        if task_data is not None:
+            return self._status_json(task_data)
+        return await self._load_shared_status(task_id)
+    
+    async def _load_shared_status(self, task_id: str) -> Optional[bytes]:
+        """Read the encoded status of a task running in another worker process"""
+        if self.status_store is None:
+            return None
+        try:
+            return await self.status_store.get(SYNC_STATUS_KEY_PREFIX + task_id)
+        except RedisError as e:
+            logger.warning("Failed to read status for task %s from Redis: %s", task_id, e)
+            return None
+    
+    @staticmethod
+    def _public_status(task_data: SyncTaskState) -> Dict[str, Any]:
+        """Status of a task as a dict, without the user's provider tokens"""
+        status = {name: getattr(task_data, name) for name in _STATUS_HEADER_FIELDS}
+        status["track_results"] = [asdict(record) for record in task_data.track_results]
+        return status
+    
+    def _record_track_result(self, task_id: str, result: TrackSyncRecord):
+        """Store a finished track's result and append its encoded JSON"""
+        task_data = self.sync_tasks[task_id]
+        task_data.track_results.append(result)
+        task_data.track_results_json += orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS) + b","
+    
+    @staticmethod
+    def _status_json(task_data: SyncTaskState) -> bytes:
+        """Encode a task's public status without re-encoding its track results"""
+        header = {name: getattr(task_data, name) for name in _STATUS_HEADER_FIELDS}
+        # Drop the header's closing brace and the results' trailing comma
+        return b"".join((
+            orjson.dumps(header, option=orjson.OPT_NON_STR_KEYS)[:-1],
+            b',"track_results":[',
+            task_data.track_results_json[:-1],
+            b"]}"
+        ))
+    
+    async def _publish_status(self, task_id: str):
+        """Mirror a task's current status into the shared store, if configured"""
+        if self.status_store is None:
+            return
+        try:
+            await self.status_store.set(
+                SYNC_STATUS_KEY_PREFIX + task_id,
+                self._status_json(self.sync_tasks[task_id]),
+                ex=SYNC_STATUS_TTL_SECONDS
+            )
+        except RedisError as e:
+            # Status sharing is best effort - never fail the sync over it
+            logger.warning("Failed to publish status for task %s to Redis: %s", task_id, e)
+    
+    async def iter_sync_history(self, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the most recent sync history items for a user, newest first"""
+        # History is stored under the same placeholder user that _add_to_history uses
+        shared_items = await self._load_shared_history("default_user")
+        if shared_items is not None:
+            for raw_item in shared_items:
+                yield orjson.loads(raw_item)
+            return
+        
         # In production, this would query a database by user_id
         # For now, return all history items
-        all_history = []
-        for user_history in self.sync_history.values():
-            for item in user_history:
-                all_history.append({
-                    "task_id": item.task_id,
-                    "spotify_playlist_name": item.spotify_playlist_name,
-                    "apple_music_playlist_name": item.apple_music_playlist_name,
-                    "status": item.status,
-                    "total_tracks": item.total_tracks,
-                    "synced_tracks": item.synced_tracks,
-                    "failed_tracks": item.failed_tracks,
-                    "created_at": item.created_at,
-                    "completed_at": item.completed_at
+        recent_items = heapq.nlargest(
+            SYNC_HISTORY_LIMIT,
+            chain.from_iterable(self.sync_history.values()),
+            key=attrgetter("created_at")
+        )
+        for item in recent_items:
+            yield {
+                "task_id": item.task_id,
+                "spotify_playlist_name": item.spotify_playlist_name,
+                "apple_music_playlist_name": item.apple_music_playlist_name,
+                "status": item.status,
+                "total_tracks": item.total_tracks,
+                "synced_tracks": item.synced_tracks,
+                "failed_tracks": item.failed_tracks,
+                "created_at": item.created_at,
+                "completed_at": item.completed_at
+            }
+    
+    async def get_sync_history(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get sync history for a user"""
+        return [item async for item in self.iter_sync_history(user_id)]
+    
+    async def _load_shared_history(self, user_id: str) -> Optional[List[bytes]]:
+        """Read the newest encoded history items from the shared store, if configured"""
+        if self.status_store is None:
+            return None
+        try:
+            return await self.status_store.zrevrange(
+                SYNC_HISTORY_KEY_PREFIX + user_id, 0, SYNC_HISTORY_LIMIT - 1
+            )
+        except RedisError as e:
+            logger.warning("Failed to read sync history from Redis: %s", e)
+            return None
+    
+    async def _publish_history_item(self, user_id: str, history_item: SyncHistoryItem):
+        """Add a history item to the user's shared history, keeping the newest items"""
+        if self.status_store is None:
+            return
+        key = SYNC_HISTORY_KEY_PREFIX + user_id
+        try:
+            async with self.status_store.pipeline(transaction=False) as pipe:
+                pipe.zadd(key, {
+                    orjson.dumps(history_item.model_dump()): history_item.created_at.timestamp()
                 })
-        
-        # Sort by created_at descending
-        all_history.sort(key=lambda x: x["created_at"], reverse=True)
-        return all_history[:50]  # Return last 50 items
+                pipe.zremrangebyrank(key, 0, -SYNC_HISTORY_MAX_ITEMS - 1)
+                await pipe.execute()
+        except RedisError as e:
+            # History sharing is best effort, like status sharing
+            logger.warning("Failed to publish sync history for task %s to Redis: %s", history_item.task_id, e)
     
-    async def _add_to_history(self, task_data: Dict[str, Any]):
+    async def _add_to_history(self, task_data: SyncTaskState):
         """Add completed sync to history"""
         # In production, save to database with proper user association
         user_id = "default_user"  # Placeholder
         
-        history_item = SyncHistoryItem(
-            task_id=task_data["task_id"],
-            spotify_playlist_name=task_data["spotify_playlist"]["name"],
-            apple_music_playlist_name=task_data.get("apple_music_playlist", {}).get("name"),
-            status=task_data["status"],
-            total_tracks=task_data["total_tracks"],
-            synced_tracks=task_data["synced_tracks"],
-            failed_tracks=task_data["failed_tracks"],
-            created_at=task_data["created_at"],
-            completed_at=task_data["completed_at"]
+        # Task data is built by this service, so construct without validation
+        history_item = SyncHistoryItem.model_construct(
+            task_id=task_data.task_id,
+            spotify_playlist_name=task_data.spotify_playlist["name"],
+            apple_music_playlist_name=(task_data.apple_music_playlist or {}).get("name"),
+            status=task_data.status,
+            total_tracks=task_data.total_tracks,
+            synced_tracks=task_data.synced_tracks,
+            failed_tracks=task_data.failed_tracks,
+            created_at=task_data.created_at,
+            completed_at=task_data.completed_at
         )
         
         if user_id not in self.sync_history:
@@ -315,5 +662,12 @@ class PlaylistSyncService:
         self.sync_history[user_id].append(history_item)
         
         # Keep only last 100 items per user
-        if len(self.sync_history[user_id]) > 100:
-            self.sync_history[user_id] = self.sync_history[user_id][-100:]
\ No newline at end of file
+        if len(self.sync_history[user_id]) > SYNC_HISTORY_MAX_ITEMS:
+            self.sync_history[user_id] = self.sync_history[user_id][-SYNC_HISTORY_MAX_ITEMS:]
+        
+        await self._publish_history_item(user_id, history_item)
+
+@lru_cache(maxsize=1)
+def get_playlist_sync_service() -> PlaylistSyncService:
+    """Return the shared PlaylistSyncService, creating it on first use"""
+    return PlaylistSyncService(get_spotify_service(), get_apple_music_service(), get_shared_store())
@@ -6,39 +6,76 @@ Handles authentication, playlist retrieval, and track information
 import asyncio
 import aiohttp
 import logging
-from typing import List, Dict, Optional, Any
-from datetime import datetime, timedelta
+import time
+from collections import deque
+from functools import lru_cache
+from typing import AsyncIterator, Deque, Iterable, List, Dict, Optional, Any, Set
 import base64
-import json
+import orjson
 
-from ..core.config import settings, TLS_CONFIG
+from ..core.config import settings
+from ..core.http_client import create_client_session
 from ..models.playlist import TrackResponse, PlaylistResponse
+from .exceptions import RateLimitException
 
 logger = logging.getLogger(__name__)
 
+# Retries after a 429 or 5xx response, with the waits between them capped
+SPOTIFY_MAX_RETRIES = 3
+SPOTIFY_MAX_RETRY_AFTER_SECONDS = 60
+SPOTIFY_MAX_BACKOFF_SECONDS = 30
+
+# Client credentials tokens are refreshed this long before Spotify expires them
+CLIENT_TOKEN_REFRESH_MARGIN_SECONDS = 60
+
+# Playlists whose tracks are fetched at the same time; each also prefetches pages
+SPOTIFY_PLAYLIST_CONCURRENCY = 8
+
+# Items per page of a paginated Spotify endpoint (the API maximum)
+SPOTIFY_PAGE_SIZE = 50
+
+# Pages requested ahead of the one being consumed once the total is known
+SPOTIFY_PAGE_PREFETCH = 10
+
+def _format_track(track: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Spotify track object into the track dict used by the app"""
+    get = track.get
+    return {
+        "id": track["id"],
+        "name": track["name"],
+        # A list comprehension joins faster than a generator expression
+        "artist": ", ".join([artist["name"] for artist in track["artists"]]),
+        "album": track["album"]["name"],
+        "duration_ms": track["duration_ms"],
+        "isrc": get("external_ids", {}).get("isrc"),
+        "preview_url": get("preview_url"),
+        "external_urls": get("external_urls", {})
+    }
+
 class SpotifyRateLimiter:
-    """Rate limiter for Spotify API calls"""
+    """Token bucket rate limiter for Spotify API calls
+    
+    Allows bursts of up to max_requests and refills at max_requests per window.
+    """
     
     def __init__(self, max_requests: int = 100, window_seconds: int = 60):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests = []
+        self.refill_rate = max_requests / window_seconds
+        self.tokens = float(max_requests)
+        self.last_refill = time.monotonic()
     
     async def acquire(self):
         """Acquire permission to make a request"""
-        now = datetime.utcnow()
-        # Remove old requests outside the window
-        self.requests = [req_time for req_time in self.requests 
-                        if now - req_time < timedelta(seconds=self.window_seconds)]
-        
-        if len(self.requests) >= self.max_requests:
-            # Wait until we can make another request
-            oldest_request = min(self.requests)
-            wait_time = (oldest_request + timedelta(seconds=self.window_seconds) - now).total_seconds()
-            if wait_time > 0:
-                await asyncio.sleep(wait_time)
-        
-        self.requests.append(now)
+        now = time.monotonic()
+        self.tokens = min(self.max_requests, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+        
+        # Take the token straight away, even into debt, so concurrent callers each
+        # wait for their own slot rather than all waking when one token frees up
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.refill_rate)
 
 class SpotifyService:
     """Service for interacting with Spotify Web API"""
@@ -47,6 +84,22 @@ class SpotifyService:
         self.base_url = "https://api.spotify.com/v1"
         self.auth_url = "https://accounts.spotify.com/api/token"
         self.rate_limiter = SpotifyRateLimiter(settings.SPOTIFY_RATE_LIMIT, 60)
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Client credentials token and the monotonic time it should be refreshed at
+        self._client_token: Optional[str] = None
+        self._client_token_expiry = 0.0
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = create_client_session()
+        return self._session
+    
+    async def close(self):
+        """Close the pooled HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def _make_request(
         self, 
@@ -56,12 +109,11 @@ class SpotifyService:
         params: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """Make a rate-limited request to Spotify API"""
-        await self.rate_limiter.acquire()
-        
-        ssl_context = aiohttp.TCPConnector(ssl_context=TLS_CONFIG)
-        async with aiohttp.ClientSession(connector=ssl_context) as session:
-            async with session.request(
+        """Make a rate-limited request to Spotify API, retrying throttled and failed calls"""
+        for attempt in range(SPOTIFY_MAX_RETRIES + 1):
+            await self.rate_limiter.acquire()
+            
+            async with self._get_session().request(
                 method=method,
                 url=url,
                 headers=headers,
@@ -69,28 +121,75 @@ class SpotifyService:
                 json=data
             ) as response:
                 if response.status == 429:  # Rate limited
-                    retry_after = int(response.headers.get('Retry-After', 1))
+                    retry_after = min(int(response.headers.get('Retry-After', 1)), SPOTIFY_MAX_RETRY_AFTER_SECONDS)
                     logger.warning(f"Rate limited by Spotify, waiting {retry_after} seconds")
-                    await asyncio.sleep(retry_after)
-                    return await self._make_request(method, url, headers, params, data)
-                
-                if not response.ok:
+                    delay = retry_after
+                elif response.status >= 500 and attempt < SPOTIFY_MAX_RETRIES:
+                    delay = min(2 ** attempt, SPOTIFY_MAX_BACKOFF_SECONDS)
+                    logger.warning(f"Spotify API error {response.status}, retrying in {delay} seconds")
+                elif not response.ok:
                     error_text = await response.text()
                     logger.error(f"Spotify API error {response.status}: {error_text}")
                     raise Exception(f"Spotify API error: {response.status}")
-                
-                return await response.json()
+                else:
+                    return await response.json(loads=orjson.loads)
+            
+            # Sleep after the response is released so the connection goes back to the pool
+            if attempt < SPOTIFY_MAX_RETRIES:
+                await asyncio.sleep(delay)
+        
+        raise RateLimitException("Spotify rate limit persisted after retries", retry_after)
+    
+    async def _iter_pages(self, url: str, headers: Dict[str, str]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every page of a paginated Spotify endpoint, in order
+        
+        The first page reports the total, so the remaining pages are requested
+        by offset, up to SPOTIFY_PAGE_PREFETCH pages ahead of the consumer.
+        """
+        page = await self._make_request("GET", url, headers, {"limit": SPOTIFY_PAGE_SIZE})
+        yield page
+        
+        total = page.get("total")
+        if total is None:
+            # Without a total, fall back to following the next links one by one
+            while page.get("next"):
+                page = await self._make_request("GET", page["next"], headers)
+                yield page
+            return
+        if not page.get("next"):
+            return
+        
+        offsets = iter(range(SPOTIFY_PAGE_SIZE, total, SPOTIFY_PAGE_SIZE))
+        pending: Deque[asyncio.Future] = deque()
+        
+        def fetch_next():
+            offset = next(offsets, None)
+            if offset is not None:
+                pending.append(asyncio.ensure_future(self._make_request(
+                    "GET", url, headers, {"limit": SPOTIFY_PAGE_SIZE, "offset": offset}
+                )))
+        
+        try:
+            for _ in range(SPOTIFY_PAGE_PREFETCH):
+                fetch_next()
+            while pending:
+                page = await pending.popleft()
+                fetch_next()
+                yield page
+        finally:
+            # The consumer stopped early or a page failed
+            for request in pending:
+                request.cancel()
+            # Retrieve the outcome of every prefetch so failures are not left unobserved
+            await asyncio.gather(*pending, return_exceptions=True)
     
     async def get_user_playlists(self, access_token: str) -> List[Dict[str, Any]]:
         """Get user's Spotify playlists"""
         headers = {"Authorization": f"Bearer {access_token}"}
         
         playlists = []
-        url = f"{self.base_url}/me/playlists"
         
-        while url:
-            response = await self._make_request("GET", url, headers, {"limit": 50})
-            
+        async for response in self._iter_pages(f"{self.base_url}/me/playlists", headers):
             for item in response.get("items", []):
                 playlist_data = {
                     "id": item["id"],
@@ -104,41 +203,63 @@ class SpotifyService:
                     "images": item.get("images", [])
                 }
                 playlists.append(playlist_data)
-            
-            url = response.get("next")
         
         return playlists
     
-    async def get_playlist_tracks(self, playlist_id: str, access_token: str) -> List[Dict[str, Any]]:
-        """Get tracks from a Spotify playlist"""
+    async def iter_playlist_tracks(
+        self,
+        playlist_id: str,
+        access_token: str,
+        dedupe: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield tracks from a Spotify playlist as each page arrives
+        
+        With dedupe, only the first track with a given ISRC is yielded; tracks
+        without an ISRC are always yielded.
+        """
         headers = {"Authorization": f"Bearer {access_token}"}
+        seen_isrcs: Set[str] = set()
         
-        tracks = []
         url = f"{self.base_url}/playlists/{playlist_id}/tracks"
         
-        while url:
-            response = await self._make_request("GET", url, headers, {"limit": 50})
-            
-            for item in response.get("items", []):
-                if not item.get("track") or item["track"]["type"] != "track":
+        async for response in self._iter_pages(url, headers):
+            for item in response.get("items", ()):
+                track = item.get("track")
+                if not track or track["type"] != "track":
                     continue  # Skip non-track items
                 
-                track = item["track"]
-                track_data = {
-                    "id": track["id"],
-                    "name": track["name"],
-                    "artist": ", ".join([artist["name"] for artist in track["artists"]]),
-                    "album": track["album"]["name"],
-                    "duration_ms": track["duration_ms"],
-                    "isrc": track.get("external_ids", {}).get("isrc"),
-                    "preview_url": track.get("preview_url"),
-                    "external_urls": track.get("external_urls", {})
-                }
-                tracks.append(track_data)
-            
-            url = response.get("next")
+                track_data = _format_track(track)
+                if dedupe and (isrc := track_data["isrc"]):
+                    if isrc in seen_isrcs:
+                        continue
+                    seen_isrcs.add(isrc)
+                yield track_data
+    
+    async def get_playlist_tracks(
+        self,
+        playlist_id: str,
+        access_token: str,
+        dedupe: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Get tracks from a Spotify playlist"""
+        return [track async for track in self.iter_playlist_tracks(playlist_id, access_token, dedupe)]
+    
+    async def get_all_playlist_tracks(
+        self,
+        access_token: str,
+        playlist_ids: Iterable[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the tracks of several playlists concurrently, keyed by playlist id"""
+        semaphore = asyncio.Semaphore(SPOTIFY_PLAYLIST_CONCURRENCY)
         
-        return tracks
+        async def fetch(playlist_id: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self.get_playlist_tracks(playlist_id, access_token)
+        
+        # The task group cancels the remaining fetches as soon as one fails
+        async with asyncio.TaskGroup() as tg:
+            tasks = {playlist_id: tg.create_task(fetch(playlist_id)) for playlist_id in dict.fromkeys(playlist_ids)}
+        return {playlist_id: task.result() for playlist_id, task in tasks.items()}
     
     async def search_track(
         self, 
@@ -155,28 +276,17 @@ class SpotifyService:
         }
         
         response = await self._make_request("GET", f"{self.base_url}/search", headers, params)
-        tracks = []
-        
-        for track in response.get("tracks", {}).get("items", []):
-            track_data = {
-                "id": track["id"],
-                "name": track["name"],
-                "artist": ", ".join([artist["name"] for artist in track["artists"]]),
-                "album": track["album"]["name"],
-                "duration_ms": track["duration_ms"],
-                "isrc": track.get("external_ids", {}).get("isrc"),
-                "preview_url": track.get("preview_url"),
-                "external_urls": track.get("external_urls", {})
-            }
-            tracks.append(track_data)
-        
-        return tracks
+        return [_format_track(track) for track in response.get("tracks", {}).get("items", ())]
     
     async def get_client_credentials_token(self) -> str:
-        """Get client credentials token for public API access"""
+        """Get client credentials token for public API access, reused until shortly before it expires"""
         if not settings.SPOTIFY_CLIENT_ID or not settings.SPOTIFY_CLIENT_SECRET:
             raise ValueError("Spotify client credentials not configured")
         
+        now = time.monotonic()
+        if self._client_token is not None and now < self._client_token_expiry:
+            return self._client_token
+        
         credentials = base64.b64encode(
             f"{settings.SPOTIFY_CLIENT_ID}:{settings.SPOTIFY_CLIENT_SECRET}".encode()
         ).decode()
@@ -188,13 +298,21 @@ class SpotifyService:
         
         data = {"grant_type": "client_credentials"}
         
-        ssl_context = aiohttp.TCPConnector(ssl_context=TLS_CONFIG)
-        async with aiohttp.ClientSession(connector=ssl_context) as session:
-            async with session.post(self.auth_url, headers=headers, data=data) as response:
-                if not response.ok:
-                    error_text = await response.text()
-                    logger.error(f"Spotify auth error: {error_text}")
-                    raise Exception("Failed to get Spotify client credentials token")
-                
-                token_data = await response.json()
-                return token_data["access_token"]
\ No newline at end of file
+        async with self._get_session().post(self.auth_url, headers=headers, data=data) as response:
+            if not response.ok:
+                error_text = await response.text()
+                logger.error(f"Spotify auth error: {error_text}")
+                raise Exception("Failed to get Spotify client credentials token")
+            
+            token_data = await response.json(loads=orjson.loads)
+        
+        self._client_token = token_data["access_token"]
+        self._client_token_expiry = (
+            now + token_data.get("expires_in", 3600) - CLIENT_TOKEN_REFRESH_MARGIN_SECONDS
+        )
+        return self._client_token
+
+@lru_cache(maxsize=1)
+def get_spotify_service() -> SpotifyService:
+    """Return the shared SpotifyService, creating it on first use"""
+    return SpotifyService()
@@ -5,7 +5,8 @@ Fixed SSL issue for production deployment
 """
 import os
 import sys
-import subprocess
+
+import uvicorn
 
 def main():
     print("🚀 Railway startup script starting...")
@@ -23,24 +24,36 @@ def main():
         print(f"Invalid PORT value: {port}, using 8000")
         port_int = 8000
     
-    # Build the uvicorn command without ANY SSL configuration
-    cmd = [
-        sys.executable, '-m', 'uvicorn',
-        'src.main:app',
-        '--host', '0.0.0.0',
-        '--port', str(port_int),
-        '--workers', '1'
-    ]
-    
-    print(f"Starting server with command: {' '.join(cmd)}")
+    print("Starting uvicorn in-process for src.main:app")
     print(f"Environment: {os.environ.get('ENVIRONMENT', 'development')}")
     print(f"Port: {port_int}")
     print(f"Working directory: {os.getcwd()}")
     
-    # Execute uvicorn using subprocess to see any errors
+    # Imported after ENVIRONMENT is forced so settings pick it up
+    from src.main import LOG_LEVEL_NAME
+    from src.core.config import settings
+    
+    # Sync status and OAuth states live in each process unless they are shared
+    # through Redis, so extra workers would answer polls for tasks they never saw
+    workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+    if workers > 1 and not settings.SYNC_STATUS_REDIS:
+        print(f"WEB_CONCURRENCY={workers} requires SYNC_STATUS_REDIS=true, running 1 worker")
+        workers = 1
+    print(f"Workers: {workers}")
+    
+    # Run uvicorn in this interpreter instead of spawning a second Python process
     try:
-        subprocess.run(cmd, check=True)
-    except subprocess.CalledProcessError as e:
+        uvicorn.run(
+            'src.main:app',
+            host='0.0.0.0',
+            port=port_int,
+            workers=workers,
+            # 'auto' picks uvloop and httptools when installed (uvloop is not on Windows)
+            loop='auto',
+            http='auto',
+            log_level=LOG_LEVEL_NAME.lower()
+        )
+    except Exception as e:
         print(f"Error running uvicorn: {e}")
         sys.exit(1)
 
@@ -11,6 +11,7 @@ from datetime import datetime
 
 from src.services.spotify_service import SpotifyService
 from src.services.apple_music_service import AppleMusicService
+from src.services.playlist_sync_service import PlaylistSyncService
 from src.services.exceptions import TrackNotFoundError
 
 
@@ -473,6 +474,61 @@ class TestPlaylistSyncIntegration:
                 assert sync_duration < 10.0  # Should complete within 10 seconds
                 assert total_matches >= 0  # Some matches should be found
                 print(f"Synced {total_matches}/{len(tracks)} tracks in {sync_duration:.2f} seconds")
+    
+    @pytest.mark.asyncio
+    async def test_sync_keeps_spotify_track_order(self):
+        """Test tracks are added and reported in playlist order when searches finish out of order"""
+        spotify_service = Mock()
+        spotify_service.get_user_playlists = AsyncMock(return_value=[
+            {"id": "playlist", "name": "Playlist", "description": "", "track_count": 250}
+        ])
+        
+        async def iter_playlist_tracks(playlist_id, access_token):
+            for i in range(250):
+                yield {"id": f"track_{i}", "name": f"Track {i}", "artist": "Artist", "isrc": None}
+        
+        spotify_service.iter_playlist_tracks = iter_playlist_tracks
+        sync_service = PlaylistSyncService(spotify_service, Mock())
+        
+        async def resolve(spotify_track, apple_token, resolved_tracks=None):
+            # Earlier tracks take longer, so later searches finish first
+            index = int(spotify_track["id"].split("_")[1])
+            await asyncio.sleep(0.001 * (index % 7))
+            if index % 10 == 0:
+                return None
+            return {"id": f"apple_{index}"}
+        
+        added = []
+        
+        async def add_tracks(apple_playlist_id, apple_track_ids, apple_token):
+            await asyncio.sleep(0.005)
+            added.extend(apple_track_ids)
+        
+        with patch.object(sync_service, '_resolve_apple_track', side_effect=resolve), \
+             patch.object(sync_service, '_add_tracks_to_apple_playlist', side_effect=add_tracks):
+            task_id = await sync_service.start_sync("playlist", "apple_token", "spotify_token")
+            await asyncio.gather(*sync_service._background_tasks)
+        
+        status = await sync_service.get_sync_status(task_id)
+        assert added == [f"apple_{i}" for i in range(250) if i % 10]
+        assert [result["spotify_track"]["id"] for result in status["track_results"]] == \
+            [f"track_{i}" for i in range(250)]
+    
+    @pytest.mark.asyncio
+    async def test_track_stream_stops_when_workers_fail(self):
+        """Test that the track producer does not hang once every worker has failed"""
+        async def spotify_tracks():
+            for i in range(1000):
+                yield {"id": f"track_{i}"}
+        
+        async def sync_track(index, spotify_track):
+            raise RuntimeError("worker failed")
+        
+        with pytest.raises(RuntimeError, match="worker failed"):
+            await asyncio.wait_for(
+                PlaylistSyncService._sync_track_stream(spotify_tracks(), sync_track),
+                timeout=5
+            )
 
 
 if __name__ == "__main__":
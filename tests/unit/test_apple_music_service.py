@@ -5,9 +5,12 @@ Tests track matching algorithms and error handling
 
 import pytest
 import asyncio
+import importlib.util
+import time
 from unittest.mock import Mock, patch, AsyncMock
 from datetime import datetime, timedelta
 
+from src.services import apple_music_service
 from src.services.apple_music_service import AppleMusicService, AppleMusicRateLimiter
 from src.services.exceptions import (
     APIException, 
@@ -45,6 +48,46 @@ class TestAppleMusicRateLimiter:
         end_time = datetime.utcnow()
         
         assert (end_time - start_time).total_seconds() >= 0.5
+    
+    @pytest.mark.asyncio
+    async def test_rate_limiter_never_exceeds_limit_under_concurrency(self):
+        """Test concurrent waiters do not burst past max_requests in any window"""
+        limiter = AppleMusicRateLimiter(max_requests=3, window_seconds=0.2)
+        release_times = []
+        
+        async def acquire():
+            await limiter.acquire()
+            release_times.append(time.monotonic())
+        
+        await asyncio.gather(*(acquire() for _ in range(9)))
+        
+        # Any max_requests + 1 consecutive releases must span a full window
+        spans = [later - earlier for earlier, later in zip(release_times, release_times[3:])]
+        assert all(span >= 0.19 for span in spans)
+
+
+class TestTrackSimilarity:
+    """Test the string similarity used for track matching"""
+    
+    def test_difflib_similarity_scores_matching_blocks(self):
+        """Test the difflib fallback counts only the greedily found matching blocks"""
+        assert apple_music_service._difflib_similarity("hello", "hello") == 1.0
+        assert apple_music_service._difflib_similarity("aXbXcdef", "abcXdefX") == 0.625
+    
+    def test_similarity_falls_back_to_difflib_without_rapidfuzz(self):
+        """Test difflib is used when rapidfuzz is not installed"""
+        if importlib.util.find_spec("rapidfuzz") is not None:
+            pytest.skip("rapidfuzz is installed")
+        
+        assert apple_music_service._similarity is apple_music_service._difflib_similarity
+    
+    def test_similarity_uses_rapidfuzz_when_installed(self):
+        """Test rapidfuzz scores the longest common subsequence when installed"""
+        pytest.importorskip("rapidfuzz")
+        
+        assert apple_music_service._similarity is not apple_music_service._difflib_similarity
+        assert apple_music_service._similarity("hello", "hello") == 1.0
+        assert apple_music_service._similarity("aXbXcdef", "abcXdefX") == 0.75
 
 
 class TestAppleMusicService:
@@ -148,6 +191,78 @@ class TestAppleMusicService:
                     title="Nonexistent Track"
                 )
     
+    @pytest.mark.asyncio
+    async def test_search_track_propagates_rate_limit(self, apple_music_service):
+        """Test a rate-limited search raises instead of reporting a missing track"""
+        with patch.object(apple_music_service, '_make_request', AsyncMock(side_effect=RateLimitException("Rate limited", 5))):
+            with pytest.raises(RateLimitException):
+                await apple_music_service.find_track(artist="Test Artist", title="Test Track")
+    
+    @pytest.mark.asyncio
+    async def test_find_track_not_found_returns_none(self, apple_music_service):
+        """Test find_track reports a miss as None instead of raising"""
+        empty_response = {"results": {}}
+        
+        with patch.object(apple_music_service, '_make_request', AsyncMock(return_value=empty_response)):
+            result = await apple_music_service.find_track(
+                artist="Nonexistent Artist",
+                title="Nonexistent Track"
+            )
+        
+        assert result is None
+        assert not apple_music_service._search_cache
+    
+    @pytest.mark.asyncio
+    async def test_search_track_coalesces_identical_searches(self, apple_music_service):
+        """Test concurrent and repeated identical searches share one lookup"""
+        mock_search_response = {
+            "results": {
+                "songs": {
+                    "data": [
+                        {
+                            "id": "apple_track_id",
+                            "attributes": {
+                                "name": "Test Track",
+                                "artistName": "Test Artist",
+                                "albumName": "Test Album",
+                                "durationInMillis": 180000,
+                                "isrc": "TEST123456"
+                            }
+                        }
+                    ]
+                }
+            }
+        }
+        
+        with patch.object(apple_music_service, '_make_request', AsyncMock(return_value=mock_search_response)) as mock_request:
+            first, second = await asyncio.gather(
+                apple_music_service.search_track(artist="Test Artist", title="Test Track", isrc="TEST123456"),
+                apple_music_service.search_track(artist="test artist", title="TEST TRACK", isrc="TEST123456")
+            )
+            third = await apple_music_service.search_track(artist="Test Artist", title="Test Track", isrc="TEST123456")
+        
+        assert first["id"] == second["id"] == third["id"] == "apple_track_id"
+        assert mock_request.call_count == 1
+        assert not apple_music_service._inflight_searches
+    
+    @pytest.mark.asyncio
+    async def test_search_tracks_bulk_preserves_order(self, apple_music_service):
+        """Test bulk search returns results in query order with None for misses"""
+        async def fake_find(artist, title, album, isrc, user_token, country):
+            if title == "Missing":
+                return None
+            await asyncio.sleep(0.01 if title == "First" else 0)
+            return {"id": title}
+        
+        with patch.object(apple_music_service, 'find_track', side_effect=fake_find):
+            results = await apple_music_service.search_tracks_bulk([
+                ("Artist", "First", None, None),
+                ("Artist", "Missing", None, None),
+                ("Artist", "Third", "Album", "ISRC123")
+            ])
+        
+        assert results == [{"id": "First"}, None, {"id": "Third"}]
+    
     def test_find_best_match_exact_match(self, apple_music_service):
         """Test best match finding with exact match"""
         songs = [
@@ -284,6 +399,49 @@ class TestAppleMusicService:
             # Should have been called twice (2 batches of 25)
             assert mock_request.call_count == 2
     
+    @pytest.mark.asyncio
+    async def test_add_tracks_to_playlist_keeps_batch_order(self, apple_music_service):
+        """Test batches are posted in playlist order by default"""
+        track_ids = [f"track{i}" for i in range(60)]
+        posted = []
+        
+        async def fake_request(method, url, user_token=None, params=None, data=None):
+            await asyncio.sleep(0.01 if not posted else 0)
+            posted.append(data["data"][0]["id"])
+        
+        with patch.object(apple_music_service, '_make_request', side_effect=fake_request):
+            await apple_music_service.add_tracks_to_playlist(
+                playlist_id="test_playlist",
+                track_ids=track_ids,
+                user_token="test_user_token"
+            )
+        
+        assert posted == ["track0", "track25", "track50"]
+    
+    @pytest.mark.asyncio
+    async def test_add_tracks_to_playlist_cancels_batches_after_failure(self, apple_music_service):
+        """Test a failed concurrent batch stops the batches still in flight"""
+        track_ids = [f"track{i}" for i in range(75)]
+        completed = []
+        
+        async def fake_request(method, url, user_token=None, params=None, data=None):
+            if data["data"][0]["id"] == "track0":
+                raise APIException("Apple Music API server error: 500", 500)
+            await asyncio.sleep(0.05)
+            completed.append(data["data"][0]["id"])
+        
+        with patch.object(apple_music_service, '_make_request', side_effect=fake_request):
+            with pytest.raises(APIException):
+                await apple_music_service.add_tracks_to_playlist(
+                    playlist_id="test_playlist",
+                    track_ids=track_ids,
+                    user_token="test_user_token",
+                    concurrency=3
+                )
+            await asyncio.sleep(0.1)
+        
+        assert completed == []
+    
     @pytest.mark.asyncio
     async def test_add_tracks_to_playlist_no_user_token(self, apple_music_service):
         """Test adding tracks to playlist without user token"""
@@ -302,8 +460,8 @@ class TestAppleMusicService:
         mock_response_429.headers = {'Retry-After': '2'}
         
         with patch.object(apple_music_service, '_get_developer_token', return_value="test_token"):
-            with patch('aiohttp.ClientSession') as mock_session_class:
-                mock_session = mock_session_class.return_value.__aenter__.return_value
+            with patch.object(apple_music_service, '_get_session') as mock_get_session:
+                mock_session = mock_get_session.return_value
                 mock_session.request.return_value.__aenter__.return_value = mock_response_429
                 
                 with pytest.raises(RateLimitException) as exc_info:
@@ -322,8 +480,8 @@ class TestAppleMusicService:
         mock_response_401.text = AsyncMock(return_value="Unauthorized")
         
         with patch.object(apple_music_service, '_get_developer_token', return_value="test_token"):
-            with patch('aiohttp.ClientSession') as mock_session_class:
-                mock_session = mock_session_class.return_value.__aenter__.return_value
+            with patch.object(apple_music_service, '_get_session') as mock_get_session:
+                mock_session = mock_get_session.return_value
                 # First call returns 401, retry also returns 401
                 mock_session.request.return_value.__aenter__.side_effect = [
                     mock_response_401,
@@ -336,6 +494,44 @@ class TestAppleMusicService:
                         "https://api.music.apple.com/v1/test"
                     )
     
+    @pytest.mark.asyncio
+    async def test_make_request_retries_once_after_auth_error(self, apple_music_service):
+        """Test a 401 is retried with a regenerated token after releasing the first response"""
+        mock_response_401 = Mock()
+        mock_response_401.status = 401
+        mock_response_401.text = AsyncMock(return_value="Unauthorized")
+        
+        mock_response_200 = Mock()
+        mock_response_200.status = 200
+        mock_response_200.ok = True
+        mock_response_200.json = AsyncMock(return_value={"data": []})
+        
+        with patch.object(apple_music_service, '_get_developer_token', side_effect=["old_token", "new_token"]):
+            with patch.object(apple_music_service, '_get_session') as mock_get_session:
+                mock_session = mock_get_session.return_value
+                request_context = mock_session.request.return_value
+                request_context.__aenter__.side_effect = [mock_response_401, mock_response_200]
+                
+                result = await apple_music_service._make_request(
+                    "GET",
+                    "https://api.music.apple.com/v1/test"
+                )
+        
+        assert result == {"data": []}
+        assert request_context.__aexit__.call_count == 2
+        retry_headers = mock_session.request.call_args_list[1].kwargs["headers"]
+        assert retry_headers["Authorization"] == "Bearer new_token"
+    
+    @pytest.mark.asyncio
+    async def test_session_reused_across_requests(self, apple_music_service):
+        """Test the HTTP session is created once and closed on shutdown"""
+        session = apple_music_service._get_session()
+        
+        assert apple_music_service._get_session() is session
+        
+        await apple_music_service.close()
+        assert session.closed
+    
     def test_format_track_response(self, apple_music_service):
         """Test track response formatting"""
         apple_music_track = {
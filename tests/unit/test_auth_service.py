@@ -0,0 +1,89 @@
+"""
+Unit tests for AuthService
+Tests OAuth state handling
+"""
+
+import pytest
+import hashlib
+import hmac
+from cachetools import TTLCache
+from unittest.mock import AsyncMock, Mock, patch
+
+from src.core.config import settings
+from src.services.auth_service import AuthService, OAUTH_NONCE_KEY_PREFIX, _state_signature
+
+
+class TestOAuthState:
+    """Test OAuth state validation"""
+    
+    @pytest.fixture
+    def auth_service(self):
+        """Create auth service instance for testing"""
+        return AuthService()
+    
+    @pytest.mark.asyncio
+    async def test_callback_rejects_replayed_state(self, auth_service):
+        """Test that a state can only be used for one callback"""
+        state = auth_service.generate_oauth_url('spotify', 'http://localhost/callback')['state']
+        
+        with patch.object(auth_service, '_handle_spotify_callback',
+                          AsyncMock(return_value={'success': True})) as handler:
+            assert await auth_service.handle_oauth_callback('spotify', 'code', state) == {'success': True}
+            
+            with pytest.raises(ValueError, match="Invalid or expired OAuth state"):
+                await auth_service.handle_oauth_callback('spotify', 'code', state)
+        
+        handler.assert_awaited_once_with('code', 'http://localhost/callback')
+    
+    @pytest.mark.asyncio
+    async def test_callback_rejects_tampered_state(self, auth_service):
+        """Test that a state with an invalid signature is rejected"""
+        state = auth_service.generate_oauth_url('spotify', 'http://localhost/callback')['state']
+        payload, _ = state.rsplit('.', 1)
+        
+        with pytest.raises(ValueError, match="Invalid or expired OAuth state"):
+            await auth_service.handle_oauth_callback('spotify', 'code', payload + '.forged')
+    
+    @pytest.mark.asyncio
+    async def test_callback_fails_closed_when_nonce_cache_is_full(self, auth_service):
+        """Test a full nonce cache rejects new states instead of evicting used ones"""
+        auth_service.used_state_nonces = TTLCache(maxsize=1, ttl=600)
+        first = auth_service.generate_oauth_url('spotify', 'http://localhost/callback')['state']
+        second = auth_service.generate_oauth_url('spotify', 'http://localhost/callback')['state']
+        
+        with patch.object(auth_service, '_handle_spotify_callback',
+                          AsyncMock(return_value={'success': True})):
+            await auth_service.handle_oauth_callback('spotify', 'code', first)
+            
+            with pytest.raises(ValueError, match="Invalid or expired OAuth state"):
+                await auth_service.handle_oauth_callback('spotify', 'code', second)
+            with pytest.raises(ValueError, match="Invalid or expired OAuth state"):
+                await auth_service.handle_oauth_callback('spotify', 'code', first)
+    
+    @pytest.mark.asyncio
+    async def test_callback_consumes_nonce_in_shared_store(self):
+        """Test the nonce is claimed with SET NX EX when Redis is configured"""
+        state_store = Mock()
+        state_store.set = AsyncMock(side_effect=[True, None])
+        auth_service = AuthService(state_store)
+        state = auth_service.generate_oauth_url('spotify', 'http://localhost/callback')['state']
+        
+        with patch.object(auth_service, '_handle_spotify_callback',
+                          AsyncMock(return_value={'success': True})):
+            await auth_service.handle_oauth_callback('spotify', 'code', state)
+            
+            with pytest.raises(ValueError, match="Invalid or expired OAuth state"):
+                await auth_service.handle_oauth_callback('spotify', 'code', state)
+        
+        key, value = state_store.set.call_args.args
+        assert key.startswith(OAUTH_NONCE_KEY_PREFIX)
+        assert state_store.set.call_args.kwargs["nx"] is True
+        assert 0 < state_store.set.call_args.kwargs["ex"] <= 600
+        assert len(auth_service.used_state_nonces) == 0
+    
+    def test_state_signature_does_not_use_raw_secret_key(self):
+        """Test states are signed with a key derived from SECRET_KEY"""
+        payload = b"payload"
+        raw_signature = hmac.new(settings.SECRET_KEY.encode(), payload, hashlib.sha256).hexdigest()[:32]
+        
+        assert _state_signature(payload) != raw_signature
@@ -0,0 +1,117 @@
+"""
+Unit tests for ASGI middleware
+Tests CORS preflight and response header handling
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.middleware import FastCORSMiddleware, UnhandledErrorMiddleware
+
+
+ALLOWED_ORIGIN = "http://localhost:3000"
+
+
+class TestFastCORSMiddleware:
+    """Test CORS middleware behaviour"""
+
+    @pytest.fixture
+    def client(self):
+        """Create a test client for a minimal app with CORS enabled"""
+        app = FastAPI()
+        app.add_middleware(FastCORSMiddleware, allowed_origins=(ALLOWED_ORIGIN,))
+
+        @app.get("/ping")
+        async def ping():
+            return {"ok": True}
+
+        return TestClient(app)
+
+    def test_preflight_allowed_origin(self, client):
+        """Test preflight for an allowed origin is answered directly"""
+        response = client.options("/ping", headers={
+            "Origin": ALLOWED_ORIGIN,
+            "Access-Control-Request-Method": "GET",
+            "Access-Control-Request-Headers": "authorization",
+        })
+
+        assert response.status_code == 204
+        assert response.headers["access-control-allow-origin"] == ALLOWED_ORIGIN
+        assert response.headers["access-control-allow-credentials"] == "true"
+        assert response.headers["access-control-allow-headers"] == "authorization"
+        assert "GET" in response.headers["access-control-allow-methods"]
+
+    def test_preflight_disallowed_origin(self, client):
+        """Test preflight from an unknown origin is rejected"""
+        response = client.options("/ping", headers={
+            "Origin": "https://evil.example.com",
+            "Access-Control-Request-Method": "GET",
+        })
+
+        assert response.status_code == 400
+        assert "access-control-allow-origin" not in response.headers
+
+    def test_preflight_disallowed_method(self, client):
+        """Test preflight for a method outside the allowed set is rejected"""
+        response = client.options("/ping", headers={
+            "Origin": ALLOWED_ORIGIN,
+            "Access-Control-Request-Method": "PATCH",
+        })
+
+        assert response.status_code == 400
+
+    def test_simple_request_gets_cors_headers(self, client):
+        """Test responses to allowed origins carry CORS headers"""
+        response = client.get("/ping", headers={"Origin": ALLOWED_ORIGIN})
+
+        assert response.status_code == 200
+        assert response.json() == {"ok": True}
+        assert response.headers["access-control-allow-origin"] == ALLOWED_ORIGIN
+        assert response.headers["vary"] == "Origin"
+
+    def test_request_without_origin_untouched(self, client):
+        """Test same-origin requests pass through without CORS headers"""
+        response = client.get("/ping")
+
+        assert response.status_code == 200
+        assert "access-control-allow-origin" not in response.headers
+
+        response = client.get("/ping", headers={"Origin": "https://evil.example.com"})
+        assert "access-control-allow-origin" not in response.headers
+
+
+
+class TestUnhandledErrorMiddleware:
+    """Test unhandled errors are answered inside the CORS middleware"""
+
+    @pytest.fixture
+    def client(self):
+        """Create a test client for an app with a failing route"""
+        app = FastAPI()
+        app.add_middleware(UnhandledErrorMiddleware)
+        app.add_middleware(FastCORSMiddleware, allowed_origins=(ALLOWED_ORIGIN,))
+
+        @app.get("/boom")
+        async def boom():
+            raise RuntimeError("boom")
+
+        return TestClient(app)
+
+    def test_unhandled_error_returns_json_500(self, client):
+        """Test an unhandled error becomes a generic JSON 500"""
+        response = client.get("/boom")
+
+        assert response.status_code == 500
+        assert response.json() == {"detail": "Internal server error"}
+
+    def test_unhandled_error_keeps_cors_headers(self, client):
+        """Test cross-origin clients can read the 500 response"""
+        response = client.get("/boom", headers={"Origin": ALLOWED_ORIGIN})
+
+        assert response.status_code == 500
+        assert response.headers["access-control-allow-origin"] == ALLOWED_ORIGIN
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,116 @@
+"""
+Unit tests for security utilities
+Tests password hashing, token handling and encryption helpers
+"""
+
+import pytest
+import base64
+import hashlib
+import secrets
+from datetime import timedelta
+from unittest.mock import patch
+
+from src.core.security import SecurityManager, SecurityException
+
+
+class TestPasswordHashing:
+    """Test password hashing and verification"""
+    
+    @pytest.fixture
+    def security_manager(self):
+        """Create security manager instance for testing"""
+        return SecurityManager()
+    
+    def test_hash_password_uses_scrypt_format(self, security_manager):
+        """Test that new hashes are version-prefixed scrypt hashes"""
+        stored_hash = security_manager.hash_password("correct horse")
+        
+        assert stored_hash.startswith("scrypt$")
+        assert security_manager.verify_password("correct horse", stored_hash)
+        assert not security_manager.verify_password("wrong horse", stored_hash)
+    
+    def test_verify_password_accepts_legacy_pbkdf2_hash(self, security_manager):
+        """Test that hashes created with the legacy PBKDF2 format still verify"""
+        salt = secrets.token_hex(32)
+        pwdhash = hashlib.pbkdf2_hmac('sha256', b"legacy", salt.encode('utf-8'), 100000)
+        legacy_hash = salt + pwdhash.hex()
+        
+        assert security_manager.verify_password("legacy", legacy_hash)
+        assert not security_manager.verify_password("other", legacy_hash)
+    
+    def test_verify_password_rejects_malformed_hash(self, security_manager):
+        """Test that malformed scrypt hashes fail verification instead of raising"""
+        assert not security_manager.verify_password("password", "scrypt$broken")
+
+
+class TestTokenVerification:
+    """Test JWT creation, verification and caching"""
+    
+    @pytest.fixture
+    def security_manager(self):
+        """Create security manager instance for testing"""
+        return SecurityManager()
+    
+    def test_verify_token_roundtrip(self, security_manager):
+        """Test that created tokens verify with the expected claims"""
+        token = security_manager.create_access_token({"user_id": "user_1"})
+        payload = security_manager.verify_token(token)
+        
+        assert payload["user_id"] == "user_1"
+        assert payload["iss"] == "playlist-sync-service"
+        assert payload["aud"] == "playlist-sync-client"
+    
+    def test_verify_token_uses_cache_for_repeated_tokens(self, security_manager):
+        """Test that a repeated token is served from the verification cache"""
+        token = security_manager.create_access_token({"user_id": "user_1"})
+        first = security_manager.verify_token(token)
+        
+        with patch("src.core.security.jwt.decode") as mock_decode:
+            second = security_manager.verify_token(token)
+        
+        mock_decode.assert_not_called()
+        assert second == first
+    
+    def test_verify_token_rejects_tampered_token(self, security_manager):
+        """Test that invalid tokens raise SecurityException"""
+        token = security_manager.create_access_token({"user_id": "user_1"})
+        
+        with pytest.raises(SecurityException):
+            security_manager.verify_token(token[:-2] + "xx")
+    
+    def test_verify_token_rejects_expired_token(self, security_manager):
+        """Test that expired tokens are rejected"""
+        token = security_manager.create_access_token(
+            {"user_id": "user_1"}, expires_delta=timedelta(seconds=-10)
+        )
+        
+        with pytest.raises(SecurityException, match="expired"):
+            security_manager.verify_token(token)
+
+
+class TestSensitiveDataEncryption:
+    """Test encryption of stored provider tokens"""
+    
+    @pytest.fixture
+    def security_manager(self):
+        """Create security manager instance for testing"""
+        return SecurityManager()
+    
+    def test_encrypt_decrypt_roundtrip(self, security_manager):
+        """Test that encrypted data decrypts to the original value"""
+        encrypted = security_manager.encrypt_sensitive_data("spotify-access-token")
+        
+        assert encrypted.startswith("v2:")
+        assert security_manager.decrypt_sensitive_data(encrypted) == "spotify-access-token"
+    
+    def test_decrypt_legacy_double_encoded_value(self, security_manager):
+        """Test that values written before the v2 format still decrypt"""
+        fernet_token = security_manager._get_fernet().encrypt(b"legacy-token")
+        legacy = base64.urlsafe_b64encode(fernet_token).decode()
+        
+        assert security_manager.decrypt_sensitive_data(legacy) == "legacy-token"
+    
+    def test_decrypt_invalid_data_raises(self, security_manager):
+        """Test that garbage input raises SecurityException"""
+        with pytest.raises(SecurityException):
+            security_manager.decrypt_sensitive_data("v2:not-a-fernet-token")
@@ -5,6 +5,7 @@ Tests all programmatic logic before development completion
 
 import pytest
 import asyncio
+import time
 from unittest.mock import Mock, patch, AsyncMock
 from datetime import datetime, timedelta
 import json
@@ -25,8 +26,8 @@ class TestSpotifyRateLimiter:
         for _ in range(5):
             await limiter.acquire()
         
-        # Should not raise any exception
-        assert len(limiter.requests) == 5
+        # The full burst is allowed and uses up the bucket
+        assert limiter.tokens < 1
     
     @pytest.mark.asyncio
     async def test_rate_limiter_blocks_requests_over_limit(self):
@@ -46,19 +47,35 @@ class TestSpotifyRateLimiter:
         assert (end_time - start_time).total_seconds() >= 0.5
     
     @pytest.mark.asyncio
-    async def test_rate_limiter_cleans_old_requests(self):
-        """Test that rate limiter cleans up old requests"""
+    async def test_rate_limiter_refills_over_time(self):
+        """Test that tokens spent in an earlier window are refilled"""
         limiter = SpotifyRateLimiter(max_requests=2, window_seconds=1)
         
-        # Add old request
-        old_time = datetime.utcnow() - timedelta(seconds=2)
-        limiter.requests.append(old_time)
+        # Spend the bucket two seconds ago
+        limiter.tokens = 0
+        limiter.last_refill = time.monotonic() - 2
         
-        # Make a new request
+        start_time = time.monotonic()
         await limiter.acquire()
         
-        # Old request should be cleaned up
-        assert len(limiter.requests) == 1
+        # Refill is capped at the bucket size and the request is not delayed
+        assert time.monotonic() - start_time < 0.1
+        assert limiter.tokens == 1
+    
+    @pytest.mark.asyncio
+    async def test_rate_limiter_spaces_concurrent_waiters(self):
+        """Test that callers waiting together are released one slot apart"""
+        limiter = SpotifyRateLimiter(max_requests=1, window_seconds=0.1)
+        release_times = []
+        
+        async def acquire():
+            await limiter.acquire()
+            release_times.append(time.monotonic())
+        
+        await asyncio.gather(*(acquire() for _ in range(4)))
+        
+        gaps = [later - earlier for earlier, later in zip(release_times, release_times[1:])]
+        assert all(gap >= 0.08 for gap in gaps)
 
 
 class TestSpotifyService:
@@ -135,6 +152,78 @@ class TestSpotifyService:
             assert track["album"] == "Test Album"
             assert track["isrc"] == "TEST123456"
     
+    @pytest.mark.asyncio
+    async def test_get_playlist_tracks_fetches_pages_by_offset_in_order(self, spotify_service):
+        """Test pages after the first are requested by offset and yielded in order"""
+        def page(offset):
+            return {
+                "items": [
+                    {
+                        "track": {
+                            "type": "track",
+                            "id": f"track_{offset + i}",
+                            "name": f"Track {offset + i}",
+                            "artists": [{"name": "Test Artist"}],
+                            "album": {"name": "Test Album"},
+                            "duration_ms": 180000
+                        }
+                    }
+                    for i in range(min(50, 120 - offset))
+                ],
+                "total": 120,
+                "next": "https://api.spotify.com/v1/next" if offset + 50 < 120 else None
+            }
+        
+        async def fake_request(method, url, headers, params=None, data=None):
+            offset = params.get("offset", 0)
+            # Later pages finish first to check ordering does not depend on timing
+            await asyncio.sleep(0.02 if offset == 50 else 0)
+            return page(offset)
+        
+        with patch.object(spotify_service, '_make_request', side_effect=fake_request) as mock_request:
+            tracks = await spotify_service.get_playlist_tracks("test_playlist_id", "test_token")
+        
+        assert [track["id"] for track in tracks] == [f"track_{i}" for i in range(120)]
+        assert [call.args[3].get("offset", 0) for call in mock_request.call_args_list] == [0, 50, 100]
+    
+    @pytest.mark.asyncio
+    async def test_get_playlist_tracks_waits_for_cancelled_prefetches(self, spotify_service):
+        """Test prefetched pages are cancelled and awaited when a page fails"""
+        finished = []
+        
+        async def fake_request(method, url, headers, params=None, data=None):
+            offset = params.get("offset", 0)
+            if offset == 0:
+                return {"items": [], "total": 200, "next": "https://api.spotify.com/v1/next"}
+            if offset == 50:
+                raise APIException("Spotify API error: 500")
+            try:
+                await asyncio.sleep(1)
+            finally:
+                finished.append(offset)
+        
+        with patch.object(spotify_service, '_make_request', side_effect=fake_request):
+            with pytest.raises(APIException):
+                await spotify_service.get_playlist_tracks("test_playlist_id", "test_token")
+        
+        assert sorted(finished) == [100, 150]
+    
+    @pytest.mark.asyncio
+    async def test_get_all_playlist_tracks_keys_results_by_playlist(self, spotify_service):
+        """Test tracks for several playlists are fetched once each and keyed by id"""
+        async def fake_tracks(playlist_id, access_token):
+            await asyncio.sleep(0.01 if playlist_id == "first" else 0)
+            return [{"id": f"{playlist_id}_track"}]
+        
+        with patch.object(spotify_service, 'get_playlist_tracks', side_effect=fake_tracks) as mock_tracks:
+            results = await spotify_service.get_all_playlist_tracks("test_token", ["first", "second", "first"])
+        
+        assert results == {
+            "first": [{"id": "first_track"}],
+            "second": [{"id": "second_track"}]
+        }
+        assert mock_tracks.call_count == 2
+    
     @pytest.mark.asyncio
     async def test_get_playlist_tracks_filters_non_tracks(self, spotify_service):
         """Test that non-track items are filtered out"""
@@ -173,6 +262,34 @@ class TestSpotifyService:
             assert len(tracks) == 1
             assert tracks[0]["id"] == "test_track_id"
     
+    @pytest.mark.asyncio
+    async def test_get_playlist_tracks_dedupes_by_isrc(self, spotify_service):
+        """Test that dedupe drops repeated ISRCs but keeps tracks without one"""
+        def item(track_id, isrc):
+            return {
+                "track": {
+                    "type": "track",
+                    "id": track_id,
+                    "name": "Test Track",
+                    "artists": [{"name": "Test Artist"}],
+                    "album": {"name": "Test Album"},
+                    "duration_ms": 180000,
+                    "external_ids": {"isrc": isrc} if isrc else {}
+                }
+            }
+        
+        mock_tracks_data = {
+            "items": [item("a", "ISRC1"), item("b", "ISRC1"), item("c", None), item("d", None)],
+            "next": None
+        }
+        
+        with patch.object(spotify_service, '_make_request', AsyncMock(return_value=mock_tracks_data)):
+            all_tracks = await spotify_service.get_playlist_tracks("test_playlist_id", "test_token")
+            unique_tracks = await spotify_service.get_playlist_tracks("test_playlist_id", "test_token", dedupe=True)
+        
+        assert [track["id"] for track in all_tracks] == ["a", "b", "c", "d"]
+        assert [track["id"] for track in unique_tracks] == ["a", "c", "d"]
+    
     @pytest.mark.asyncio
     async def test_search_track_success(self, spotify_service):
         """Test successful track search"""
@@ -213,8 +330,8 @@ class TestSpotifyService:
         mock_response_200.ok = True
         mock_response_200.json = AsyncMock(return_value={"success": True})
         
-        with patch('aiohttp.ClientSession') as mock_session_class:
-            mock_session = mock_session_class.return_value.__aenter__.return_value
+        with patch.object(spotify_service, '_get_session') as mock_get_session:
+            mock_session = mock_get_session.return_value
             mock_session.request.return_value.__aenter__.side_effect = [
                 mock_response_429,  # First call returns rate limit
                 mock_response_200   # Second call succeeds
@@ -231,6 +348,58 @@ class TestSpotifyService:
                 mock_sleep.assert_called_once_with(1)
                 assert result == {"success": True}
     
+    @pytest.mark.asyncio
+    async def test_make_request_retries_server_errors_with_backoff(self, spotify_service):
+        """Test that 5xx responses are retried with exponential backoff"""
+        mock_response_503 = Mock()
+        mock_response_503.status = 503
+        mock_response_503.ok = False
+        
+        mock_response_200 = Mock()
+        mock_response_200.status = 200
+        mock_response_200.ok = True
+        mock_response_200.json = AsyncMock(return_value={"success": True})
+        
+        with patch.object(spotify_service, '_get_session') as mock_get_session:
+            mock_session = mock_get_session.return_value
+            mock_session.request.return_value.__aenter__.side_effect = [
+                mock_response_503,
+                mock_response_503,
+                mock_response_200
+            ]
+            
+            with patch('asyncio.sleep', AsyncMock()) as mock_sleep:
+                result = await spotify_service._make_request(
+                    "GET", 
+                    "https://api.spotify.com/v1/test", 
+                    {"Authorization": "Bearer test"}
+                )
+                
+                assert [call.args[0] for call in mock_sleep.await_args_list] == [1, 2]
+                assert result == {"success": True}
+    
+    @pytest.mark.asyncio
+    async def test_make_request_gives_up_on_persistent_rate_limit(self, spotify_service):
+        """Test that a rate limit outlasting every retry raises instead of recursing"""
+        mock_response_429 = Mock()
+        mock_response_429.status = 429
+        mock_response_429.headers = {'Retry-After': '3600'}
+        
+        with patch.object(spotify_service, '_get_session') as mock_get_session:
+            mock_session = mock_get_session.return_value
+            mock_session.request.return_value.__aenter__.return_value = mock_response_429
+            
+            with patch('asyncio.sleep', AsyncMock()) as mock_sleep:
+                with pytest.raises(RateLimitException):
+                    await spotify_service._make_request(
+                        "GET", 
+                        "https://api.spotify.com/v1/test", 
+                        {"Authorization": "Bearer test"}
+                    )
+                
+                # Retry-After is capped and there is no wait after the last attempt
+                assert [call.args[0] for call in mock_sleep.await_args_list] == [60, 60, 60]
+    
     @pytest.mark.asyncio
     async def test_make_request_handles_api_error(self, spotify_service):
         """Test that _make_request handles API errors properly"""
@@ -239,8 +408,8 @@ class TestSpotifyService:
         mock_response.ok = False
         mock_response.text = AsyncMock(return_value="Bad Request")
         
-        with patch('aiohttp.ClientSession') as mock_session_class:
-            mock_session = mock_session_class.return_value.__aenter__.return_value
+        with patch.object(spotify_service, '_get_session') as mock_get_session:
+            mock_session = mock_get_session.return_value
             mock_session.request.return_value.__aenter__.return_value = mock_response
             
             with pytest.raises(Exception, match="Spotify API error: 400"):
@@ -263,8 +432,8 @@ class TestSpotifyService:
         mock_response.ok = True
         mock_response.json = AsyncMock(return_value=mock_token_response)
         
-        with patch('aiohttp.ClientSession') as mock_session_class:
-            mock_session = mock_session_class.return_value.__aenter__.return_value
+        with patch.object(spotify_service, '_get_session') as mock_get_session:
+            mock_session = mock_get_session.return_value
             mock_session.post.return_value.__aenter__.return_value = mock_response
             
             with patch.dict('src.core.config.settings.__dict__', {
@@ -273,6 +442,20 @@ class TestSpotifyService:
             }):
                 token = await spotify_service.get_client_credentials_token()
                 assert token == "test_client_token"
+                
+                # The cached token is reused until it nears expiry
+                assert await spotify_service.get_client_credentials_token() == "test_client_token"
+                assert mock_session.post.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_session_reused_across_requests(self, spotify_service):
+        """Test the HTTP session is created once and closed on shutdown"""
+        session = spotify_service._get_session()
+        
+        assert spotify_service._get_session() is session
+        
+        await spotify_service.close()
+        assert session.closed
     
     @pytest.mark.asyncio
     async def test_get_client_credentials_token_missing_credentials(self, spotify_service):